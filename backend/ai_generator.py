@@ -1,64 +1,124 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import anthropic
+import httpx
+
+# Shared Anthropic clients keyed by API key so every AIGenerator reuses the
+# same pooled keep-alive connections instead of re-doing TCP+TLS handshakes
+_CLIENT_CACHE: Dict[str, anthropic.Anthropic] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+# Async clients are bound to the event loop that first uses them, so they are
+# pooled per loop as well as per API key; a loop's clients go when it does
+_ASYNC_CLIENT_CACHE: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# Shared pool for running a round's tool calls concurrently; module level so
+# threads are reused across requests rather than spun up per call
+_TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool")
+
+
+def _get_client(api_key: str) -> anthropic.Anthropic:
+    """Return the pooled Anthropic client for an API key, creating it once"""
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(api_key)
+        if client is None:
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32, max_connections=64
+                    ),
+                    timeout=60,
+                ),
+            )
+            _CLIENT_CACHE[api_key] = client
+        return client
+
+
+def _get_async_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Return the running loop's pooled async client for an API key"""
+    loop = asyncio.get_running_loop()
+    with _CLIENT_CACHE_LOCK:
+        clients = _ASYNC_CLIENT_CACHE.setdefault(loop, {})
+        client = clients.get(api_key)
+        if client is None:
+            client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32, max_connections=64
+                    ),
+                    timeout=60,
+                ),
+            )
+            clients[api_key] = client
+        return client
 
 
 class AIGenerator:
     """Handles interactions with Anthropic's Claude API for generating responses"""
 
     # Static system prompt to avoid rebuilding on each call
-    SYSTEM_PROMPT = """ You are an AI assistant specialized in course materials and educational content with access to comprehensive search tools for course information.
-
-Available Tools:
-1. **Content Search Tool** - For questions about specific course content or detailed educational materials
-2. **Course Outline Tool** - For questions about course structure, lesson lists, or course navigation
-
-Multi-Round Tool Usage Guidelines:
-- **Strategic tool use**: You can make multiple tool calls across up to 2 rounds to gather comprehensive information
-- **Progressive refinement**: Use initial tool results to inform more targeted follow-up searches
-- **Information synthesis**: Combine results from multiple tool calls to provide complete answers
-- **Efficiency focus**: Only use additional rounds when initial results are insufficient
-
-Tool Usage Protocol:
-- **Content questions**: Use content search for specific topics, concepts, or detailed course material
-- **Structure questions**: Use outline tool for course overviews, lesson lists, or when users ask "what's in this course"
-- **Multi-aspect queries**: Break down complex questions into multiple targeted tool calls
-- **Verification searches**: Use follow-up searches to verify or expand on initial findings
-- Synthesize tool results into accurate, fact-based responses
-- If tools yield no results, state this clearly without offering alternatives
-
-Response Protocol:
-- **General knowledge questions**: Answer using existing knowledge without using tools
-- **Course-specific questions**: Use appropriate tools across multiple rounds if needed
-- **Comprehensive synthesis**: Always provide a complete answer that addresses all aspects of the user's question
-- **No meta-commentary**:
- - Provide direct answers only — no reasoning process, search explanations, or question-type analysis
- - Do not mention "based on the search results" or "using the tool"
-
-All responses must be:
-1. **Brief, Concise and focused** - Get to the point quickly
-2. **Educational** - Maintain instructional value
-3. **Clear** - Use accessible language
-4. **Example-supported** - Include relevant examples when they aid understanding
-5. **Comprehensive** - Address all aspects of the user's question using information from all tool calls
-Provide only the direct answer to what was asked.
+    SYSTEM_PROMPT = """You are an assistant for course materials with two search tools:
+1. **Content Search Tool** - specific course content and concepts
+2. **Course Outline Tool** - course structure: title, link and lesson list
+
+Multi-Round Tool Usage:
+- Make tool calls across up to 2 rounds; use a second round only when first results are insufficient
+- Split multi-part questions into targeted calls and build follow-ups on earlier results
+- Answer general knowledge questions without tools
+- If tools return nothing, say so plainly without offering alternatives
+
+Answers:
+- Brief, clear and educational, with examples when they help
+- Address every part of the question using all tool results
+- Direct answers only: no reasoning, search narration, or phrases like "based on the search results"
 """
 
-    def __init__(self, api_key: str, model: str):
+    def __init__(self, api_key: str, model: str, response_cache_size: int = 0):
         self.api_key = api_key
         self.model = model
         self.use_mock = not api_key or api_key == "your-anthropic-api-key-here"
 
         if not self.use_mock:
-            self.client = anthropic.Anthropic(api_key=api_key)
+            self.client = _get_client(api_key)
 
         # Pre-build base API parameters
         self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
 
+        # Static system prompt as a cacheable block so Anthropic's prompt cache
+        # can serve the prefix on every round and follow-up query
+        self._cached_system_block = [
+            {
+                "type": "text",
+                "text": self.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        # System content per (round, max_rounds, final_round); only the small
+        # round suffix differs, so each combination is built once and reused
+        self._system_content_cache: Dict[tuple, List[Dict[str, Any]]] = {}
+
+        # Opt-in exact-match response cache (LRU) of (response, sources the
+        # tool calls produced); disabled when size is 0
+        self.response_cache_size = response_cache_size
+        self._response_cache: "OrderedDict[str, Tuple[str, tuple]]" = OrderedDict()
+        # Requests run on several threads; the lock keeps a lookup's
+        # move_to_end from racing another request's eviction
+        self._response_cache_lock = threading.Lock()
+
     def generate_response(
         self,
         query: str,
-        conversation_history: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
         tools: Optional[List] = None,
         tool_manager=None,
         enable_multi_round: bool = True,
@@ -68,7 +128,7 @@ Provide only the direct answer to what was asked.
 
         Args:
             query: The user's question or request
-            conversation_history: Previous messages for context
+            conversation_history: Previous turns as {"role", "content"} messages
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
             enable_multi_round: Whether to enable multi-round tool calling
@@ -76,26 +136,6 @@ Provide only the direct answer to what was asked.
         Returns:
             Generated response as string
         """
-
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
-        )
-
-        # Prepare API call parameters efficiently
-        api_params = {
-            **self.base_params,
-            "messages": [{"role": "user", "content": query}],
-            "system": system_content,
-        }
-
-        # Add tools if available
-        if tools:
-            api_params["tools"] = tools
-            api_params["tool_choice"] = {"type": "auto"}
-
         # Use mock responses if no API key
         if self.use_mock:
             return self._generate_mock_response(query, tools, tool_manager)
@@ -131,36 +171,31 @@ Provide only the direct answer to what was asked.
         # Add AI's tool use response
         messages.append({"role": "assistant", "content": initial_response.content})
 
-        # Execute all tool calls and collect results
+        # Execute all tool calls concurrently and collect results
         tool_results = []
-        for content_block in initial_response.content:
-            if content_block.type == "tool_use":
-                tool_result = tool_manager.execute_tool(
-                    content_block.name, **content_block.input
-                )
-
-                tool_results.append(
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": content_block.id,
-                        "content": tool_result,
-                    }
-                )
+        for content_block, tool_result in self._execute_tool_calls(
+            initial_response, tool_manager
+        ):
+            if isinstance(tool_result, Exception):
+                raise tool_result
+
+            tool_results.append(
+                {
+                    "type": "tool_result",
+                    "tool_use_id": content_block.id,
+                    "content": tool_result,
+                }
+            )
 
         # Add tool results as single message
         if tool_results:
             messages.append({"role": "user", "content": tool_results})
 
-        # Prepare final API call without tools
-        final_params = {
-            **self.base_params,
-            "messages": messages,
-            "system": base_params["system"],
-        }
-
-        # Get final response
-        final_response = self.client.messages.create(**final_params)
-        return final_response.content[0].text
+        # Get final response without tools
+        final_response = self.client.messages.create(
+            **self._build_api_params(messages, base_params["system"])
+        )
+        return self._extract_text(final_response)
 
     def _generate_mock_response(
         self, _query: str, _tools: Optional[List] = None, _tool_manager=None
@@ -171,7 +206,7 @@ Provide only the direct answer to what was asked.
     def generate_response_with_rounds(
         self,
         query: str,
-        conversation_history: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
         tools: Optional[List] = None,
         tool_manager=None,
         max_rounds: int = 2,
@@ -181,7 +216,7 @@ Provide only the direct answer to what was asked.
 
         Args:
             query: The user's question or request
-            conversation_history: Previous messages for context
+            conversation_history: Previous turns as {"role", "content"} messages
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
             max_rounds: Maximum number of tool-calling rounds (default: 2)
@@ -189,22 +224,39 @@ Provide only the direct answer to what was asked.
         Returns:
             Generated response as string
         """
+        # Use mock responses if no API key, before any request is assembled
+        if self.use_mock:
+            return self._generate_mock_response(query, tools, tool_manager)
+
         # Initialize round tracking
         current_round = 0
-        messages = [{"role": "user", "content": query}]
+        messages = self._build_initial_messages(query, conversation_history)
+
+        # Serve repeated requests without calling Claude
+        cache_key = self._response_cache_key("rounds", messages, tools, max_rounds)
+        cached = self._get_cached_response(cache_key, tool_manager)
+        if cached is not None:
+            return cached
+        sources_start = self._sources_start(cache_key, tool_manager)
+
+        # Clone tools once so the cache breakpoint doesn't leak into callers
+        if tools:
+            tools = self._tools_with_cache(tools)
 
         while current_round < max_rounds:
             current_round += 1
 
             # Build system content for current round
             system_content = self._build_system_content_for_round(
-                conversation_history, current_round, max_rounds
+                current_round, max_rounds
             )
 
             # Make API call with tools
             try:
-                response = self._make_api_call_with_tools(
-                    messages, system_content, tools
+                response = self.client.messages.create(
+                    **self._build_api_params(
+                        messages, system_content, tools, cache_tools=False
+                    )
                 )
             except Exception as e:
                 return f"Error in round {current_round}: {str(e)}"
@@ -212,11 +264,13 @@ Provide only the direct answer to what was asked.
             # Check if tools were used
             if response.stop_reason != "tool_use":
                 # No tools used - return response
-                return response.content[0].text
+                return self._cache_response(
+                    cache_key, self._extract_text(response), tool_manager, sources_start
+                )
 
             # Execute tools and update messages
             try:
-                messages = self._execute_tools_and_update_messages(
+                messages = self._append_round_to_messages(
                     response, messages, tool_manager
                 )
             except Exception as e:
@@ -224,162 +278,630 @@ Provide only the direct answer to what was asked.
 
         # Final call without tools
         system_content = self._build_system_content_for_round(
-            conversation_history, current_round, max_rounds, final_round=True
+            current_round, max_rounds, final_round=True
         )
         try:
-            final_response = self._make_final_api_call(messages, system_content)
-            return final_response.content[0].text
+            final_response = self.client.messages.create(
+                **self._build_api_params(messages, system_content)
+            )
+            return self._cache_response(
+                cache_key,
+                self._extract_text(final_response),
+                tool_manager,
+                sources_start,
+            )
         except Exception as e:
             return f"Error generating final response: {str(e)}"
 
+    def generate_response_stream(
+        self,
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        max_rounds: int = 2,
+    ) -> Iterator[str]:
+        """
+        Stream a response as text chunks while Claude generates it.
+
+        Follows the same multi-round tool loop as generate_response_with_rounds
+        and yields the same text. A round that may call tools is only sent
+        once it ends without a tool call, so preamble like "Let me search..."
+        is dropped as it is there; the final tool-free round streams as it is
+        generated.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of tool-calling rounds (default: 2)
+
+        Yields:
+            Text chunks of the response
+        """
+        if self.use_mock:
+            yield self._generate_mock_response(query, tools, tool_manager)
+            return
+
+        messages = self._build_initial_messages(query, conversation_history)
+        if tools:
+            tools = self._tools_with_cache(tools)
+
+        current_round = 0
+        while tools and tool_manager and current_round < max_rounds:
+            current_round += 1
+            system_content = self._build_system_content_for_round(
+                current_round, max_rounds
+            )
+            api_params = self._build_api_params(
+                messages, system_content, tools, cache_tools=False
+            )
+
+            try:
+                with self.client.messages.stream(**api_params) as stream:
+                    response = stream.get_final_message()
+            except Exception as e:
+                yield f"Error in round {current_round}: {str(e)}"
+                return
+
+            if response.stop_reason != "tool_use":
+                # Answered without tools; this round's text is the answer
+                yield self._extract_text(response)
+                return
+
+            try:
+                messages = self._append_round_to_messages(
+                    response, messages, tool_manager
+                )
+            except Exception as e:
+                yield f"Tool execution error in round {current_round}: {str(e)}"
+                return
+
+        # Final (or only) call without tools
+        system_content = self._build_system_content_for_round(
+            current_round, max_rounds, final_round=current_round > 0
+        )
+        api_params = self._build_api_params(messages, system_content)
+        try:
+            with self.client.messages.stream(**api_params) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            yield f"Error generating final response: {str(e)}"
+
+    async def generate_response_batch(
+        self,
+        queries: List[str],
+        tools: Optional[List] = None,
+        tool_manager=None,
+        max_rounds: int = 2,
+        max_concurrency: int = 8,
+    ) -> List[str]:
+        """
+        Generate responses for many queries concurrently.
+
+        Each query runs its own multi-round tool loop; at most
+        max_concurrency requests are in flight at once.
+
+        Args:
+            queries: User questions to answer
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of tool-calling rounds per query
+            max_concurrency: Maximum number of concurrent API requests
+
+        Returns:
+            Generated responses in the same order as queries
+        """
+        if self.use_mock:
+            return [
+                self._generate_mock_response(query, tools, tool_manager)
+                for query in queries
+            ]
+
+        if tools:
+            tools = self._tools_with_cache(tools)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        async_client = _get_async_client(self.api_key)
+
+        async def run_query(query: str) -> str:
+            async with semaphore:
+                return await self._run_rounds_async(
+                    async_client, query, tools, tool_manager, max_rounds
+                )
+
+        return list(await asyncio.gather(*(run_query(q) for q in queries)))
+
+    async def agenerate_response(
+        self,
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        max_rounds: int = 2,
+    ) -> str:
+        """
+        Async counterpart of generate_response_with_rounds.
+
+        A round's tool calls are awaited concurrently, so the round costs
+        roughly its slowest tool rather than the sum of all of them.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous turns as {"role", "content"} messages
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of tool-calling rounds (default: 2)
+
+        Returns:
+            Generated response as string
+        """
+        if self.use_mock:
+            return self._generate_mock_response(query, tools, tool_manager)
+
+        if tools:
+            tools = self._tools_with_cache(tools)
+
+        return await self._run_rounds_async(
+            _get_async_client(self.api_key),
+            query,
+            tools,
+            tool_manager,
+            max_rounds,
+            conversation_history,
+        )
+
+    async def _run_rounds_async(
+        self,
+        async_client,
+        query: str,
+        tools: Optional[List],
+        tool_manager,
+        max_rounds: int,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+    ) -> str:
+        """
+        Async counterpart of generate_response_with_rounds for batch callers.
+        A round's tool calls are awaited together so other queries keep running.
+        """
+        current_round = 0
+        messages = self._build_initial_messages(query, conversation_history)
+
+        while current_round < max_rounds:
+            current_round += 1
+
+            system_content = self._build_system_content_for_round(
+                current_round, max_rounds
+            )
+            api_params = self._build_api_params(
+                messages, system_content, tools, cache_tools=False
+            )
+
+            try:
+                response = await async_client.messages.create(**api_params)
+            except Exception as e:
+                return f"Error in round {current_round}: {str(e)}"
+
+            if response.stop_reason != "tool_use" or not tool_manager:
+                return self._extract_text(response)
+
+            try:
+                executed = await self._aexecute_tool_calls(response, tool_manager)
+                messages = self._append_tool_results(response, messages, executed)
+            except Exception as e:
+                return f"Tool execution error in round {current_round}: {str(e)}"
+
+        system_content = self._build_system_content_for_round(
+            current_round, max_rounds, final_round=True
+        )
+        try:
+            final_response = await async_client.messages.create(
+                **self._build_api_params(messages, system_content)
+            )
+            return self._extract_text(final_response)
+        except Exception as e:
+            return f"Error generating final response: {str(e)}"
+
+    def generate_response_batch_submit(
+        self, queries: List[str], poll_interval: float = 10.0
+    ) -> List[str]:
+        """
+        Answer queries through Anthropic's Message Batches API.
+
+        Batches are billed at a discount but complete asynchronously, so this
+        blocks while polling. Tool calling is not available in this mode.
+
+        Args:
+            queries: User questions to answer
+            poll_interval: Seconds to wait between batch status checks
+
+        Returns:
+            Generated responses in the same order as queries
+        """
+        if self.use_mock:
+            return [self._generate_mock_response(query) for query in queries]
+
+        system_content = self._build_system_content_for_round(0, 0)
+        requests = [
+            {
+                "custom_id": f"query-{index}",
+                "params": self._build_api_params(
+                    self._build_initial_messages(query, None), system_content
+                ),
+            }
+            for index, query in enumerate(queries)
+        ]
+
+        batch = self.client.messages.batches.create(requests=requests)
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        # Results stream back in arbitrary order - match them by custom_id
+        answers = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                answers[entry.custom_id] = self._extract_text(entry.result.message)
+            else:
+                answers[entry.custom_id] = f"Batch request {entry.result.type}"
+
+        return [
+            answers.get(f"query-{index}", "Batch request missing")
+            for index in range(len(queries))
+        ]
+
     def _generate_single_round_response(
         self,
         query: str,
-        conversation_history: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
         tools: Optional[List] = None,
         tool_manager=None,
     ) -> str:
         """
         Original single-round response generation logic.
         """
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
-        )
+        messages = self._build_initial_messages(query, conversation_history)
 
-        # Prepare API call parameters efficiently
-        api_params = {
-            **self.base_params,
-            "messages": [{"role": "user", "content": query}],
-            "system": system_content,
-        }
+        # Serve repeated requests without calling Claude
+        cache_key = self._response_cache_key("single", messages, tools)
+        cached = self._get_cached_response(cache_key, tool_manager)
+        if cached is not None:
+            return cached
+        sources_start = self._sources_start(cache_key, tool_manager)
 
-        # Add tools if available
-        if tools:
-            api_params["tools"] = tools
-            api_params["tool_choice"] = {"type": "auto"}
+        # Build system content as cacheable blocks
+        system_content = self._build_system_content_for_round(0, 0)
+
+        api_params = self._build_api_params(messages, system_content, tools)
 
         # Get response from Claude
         response = self.client.messages.create(**api_params)
 
         # Handle tool execution if needed
         if response.stop_reason == "tool_use" and tool_manager:
-            return self._handle_tool_execution(response, api_params, tool_manager)
+            return self._cache_response(
+                cache_key,
+                self._handle_tool_execution(response, api_params, tool_manager),
+                tool_manager,
+                sources_start,
+            )
 
         # Return direct response
-        return response.content[0].text
+        return self._cache_response(
+            cache_key, self._extract_text(response), tool_manager, sources_start
+        )
+
+    def _response_cache_key(
+        self,
+        mode: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List],
+        max_rounds: int = 1,
+    ) -> Optional[str]:
+        """
+        Hash the request inputs into a response cache key.
+
+        Returns None when the cache is disabled. The key covers everything
+        that shapes the answer: model, system prompt, tools and messages.
+        """
+        if not self.response_cache_size:
+            return None
+
+        canonical = json.dumps(
+            {
+                "mode": mode,
+                "max_rounds": max_rounds,
+                "model": self.model,
+                "system": self.SYSTEM_PROMPT,
+                "tools": tools or [],
+                "messages": messages,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _get_cached_response(
+        self, cache_key: Optional[str], tool_manager=None
+    ) -> Optional[str]:
+        """
+        Return a cached response and mark it most recently used. The sources
+        its tool calls produced are recorded on tool_manager as if they had
+        run again.
+        """
+        if cache_key is None:
+            return None
+
+        with self._response_cache_lock:
+            entry = self._response_cache.get(cache_key)
+            if entry is None:
+                return None
+            self._response_cache.move_to_end(cache_key)
+
+        response, sources = entry
+        if tool_manager is not None and sources:
+            tool_manager.record_sources(sources)
+        return response
+
+    @staticmethod
+    def _sources_start(cache_key: Optional[str], tool_manager) -> int:
+        """Sources tool_manager held before this request, when caching"""
+        if cache_key is None or tool_manager is None:
+            return 0
+        return len(tool_manager.get_last_sources())
+
+    def _cache_response(
+        self,
+        cache_key: Optional[str],
+        response: str,
+        tool_manager=None,
+        sources_start: int = 0,
+    ) -> str:
+        """
+        Store a successful response with the sources its tool calls added to
+        tool_manager, evicting the least recently used entry.
+        """
+        if cache_key is not None:
+            sources = ()
+            if tool_manager is not None:
+                sources = tuple(tool_manager.get_last_sources()[sources_start:])
+            with self._response_cache_lock:
+                self._response_cache[cache_key] = (response, sources)
+                self._response_cache.move_to_end(cache_key)
+                if len(self._response_cache) > self.response_cache_size:
+                    self._response_cache.popitem(last=False)
+
+        return response
+
+    def clear_response_cache(self):
+        """Drop cached responses; call whenever the indexed content changes"""
+        with self._response_cache_lock:
+            self._response_cache.clear()
 
     def _build_system_content_for_round(
         self,
-        conversation_history: Optional[str],
         current_round: int,
         max_rounds: int,
         final_round: bool = False,
-    ) -> str:
+    ) -> List[Dict[str, Any]]:
         """
-        Build system content with round-specific guidance.
-        """
-        base_prompt = self.SYSTEM_PROMPT
+        Build system content blocks with round-specific guidance.
 
-        if conversation_history:
-            base_prompt += f"\n\nPrevious conversation:\n{conversation_history}"
+        Block 0 is the cached static SYSTEM_PROMPT; round guidance follows
+        in an uncached block so it never invalidates the cached prefix.
+        Conversation history is sent as prior messages, not system content,
+        so the result depends only on the round and is memoized.
+        """
+        key = (current_round, max_rounds, final_round)
+        system_content = self._system_content_cache.get(key)
+        if system_content is None:
+            system_content = self._cached_system_block
+            suffix = self._round_suffix(current_round, max_rounds, final_round)
+            if suffix:
+                system_content = system_content + [{"type": "text", "text": suffix}]
+            self._system_content_cache[key] = system_content
+        return system_content
+
+    @staticmethod
+    def _round_suffix(
+        current_round: int, max_rounds: int, final_round: bool = False
+    ) -> str:
+        """Return the uncached round-specific guidance ("" when there is none)"""
+        # Collect dynamic fragments and join once instead of repeated +=
+        parts = []
 
         # Add round-specific instructions
         if final_round:
-            base_prompt += "\n\nThis is your final response. Provide a comprehensive answer based on all the information gathered. No more tools are available."
+            parts.append(
+                "This is your final response. Provide a comprehensive answer based on all the information gathered. No more tools are available."
+            )
         elif current_round > 0:
             remaining_rounds = max_rounds - current_round
             if remaining_rounds > 0:
-                base_prompt += f"\n\nROUND {current_round}/{max_rounds}: You have {remaining_rounds} more tool call opportunities. Use them to gather additional information if needed, or provide a final answer if you have sufficient information."
+                parts.append(
+                    f"ROUND {current_round}/{max_rounds}: You have {remaining_rounds} more tool call opportunities. Use them to gather additional information if needed, or provide a final answer if you have sufficient information."
+                )
             else:
-                base_prompt += f"\n\nROUND {current_round}/{max_rounds}: This is your final tool round. Use tools if you need additional information."
+                parts.append(
+                    f"ROUND {current_round}/{max_rounds}: This is your final tool round. Use tools if you need additional information."
+                )
 
-        return base_prompt
+        return "\n\n".join(parts)
 
-    def _make_api_call_with_tools(
-        self, messages: List[Dict], system_content: str, tools: Optional[List]
-    ):
+    @staticmethod
+    def _extract_text(response) -> str:
         """
-        Make API call with tools enabled.
+        Join the text blocks of a Claude response.
+
+        Safer than content[0].text, which breaks when the first block is a
+        tool_use or other non-text block.
         """
-        api_params = {
-            **self.base_params,
-            "messages": messages,
-            "system": system_content,
-        }
+        return "".join(
+            block.text
+            for block in response.content
+            if getattr(block, "type", None) == "text"
+        )
 
-        # Add tools if available
-        if tools:
-            api_params["tools"] = tools
-            api_params["tool_choice"] = {"type": "auto"}
+    @staticmethod
+    def _build_initial_messages(
+        query: str, conversation_history: Optional[List[Dict[str, str]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the opening message list: prior conversation turns followed by
+        the current query, keeping the system prefix identical across turns.
+        """
+        messages = list(conversation_history) if conversation_history else []
+        messages.append({"role": "user", "content": query})
+        return messages
 
-        return self.client.messages.create(**api_params)
+    @staticmethod
+    def _tools_with_cache(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return a copy of tools with a cache breakpoint on the last definition,
+        so tool schemas are cached together with the system prompt.
+        """
+        cached_tools = list(tools)
+        cached_tools[-1] = {**cached_tools[-1], "cache_control": {"type": "ephemeral"}}
+        return cached_tools
 
-    def _make_final_api_call(self, messages: List[Dict], system_content: str):
+    def _build_api_params(
+        self,
+        messages: List[Dict],
+        system_content: List[Dict[str, Any]],
+        tools: Optional[List] = None,
+        cache_tools: bool = True,
+    ) -> Dict[str, Any]:
         """
-        Make final API call without tools.
+        Build messages.create/stream parameters for every call path.
+
+        Pass cache_tools=False when tools already carry their cache breakpoint.
         """
-        api_params = {
+        params = {
             **self.base_params,
             "messages": messages,
             "system": system_content,
         }
 
-        return self.client.messages.create(**api_params)
+        # Add tools if available
+        if tools:
+            params["tools"] = self._tools_with_cache(tools) if cache_tools else tools
+            params["tool_choice"] = {"type": "auto"}
+
+        return params
 
-    def _execute_tools_and_update_messages(
+    def _append_round_to_messages(
         self, response, messages: List[Dict], tool_manager
     ) -> List[Dict]:
         """
-        Execute tools from response and update message history.
+        Execute tools from response and append the round to messages.
+
+        The list is mutated in place (callers own it for the whole tool loop)
+        and returned for convenience.
+
+        Returns:
+            The same messages list with assistant response and tool results
+        """
+        return self._append_tool_results(
+            response, messages, self._execute_tool_calls(response, tool_manager)
+        )
+
+    @staticmethod
+    def _append_tool_results(
+        response, messages: List[Dict], executed: List[Tuple[Any, Any]]
+    ) -> List[Dict]:
+        """
+        Append the assistant turn and its executed tool calls to messages.
+
+        Args:
+            response: The response containing tool use requests
+            messages: Conversation so far, mutated in place
+            executed: (tool_use block, result or exception) pairs
 
         Returns:
-            Updated messages list with assistant response and tool results
+            The same messages list with assistant response and tool results
         """
         # Add AI's tool use response
-        updated_messages = messages.copy()
-        updated_messages.append({"role": "assistant", "content": response.content})
+        messages.append({"role": "assistant", "content": response.content})
 
-        # Execute all tool calls and collect results
         tool_results = []
         has_successful_execution = False
 
-        for content_block in response.content:
-            if content_block.type == "tool_use":
-                try:
-                    tool_result = tool_manager.execute_tool(
-                        content_block.name, **content_block.input
-                    )
-
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": tool_result,
-                        }
-                    )
-                    has_successful_execution = True
-
-                except Exception as e:
-                    # Log error but continue with other tools
-                    error_message = f"Tool execution failed: {str(e)}"
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": error_message,
-                            "is_error": True,
-                        }
-                    )
+        for content_block, tool_result in executed:
+            if isinstance(tool_result, Exception):
+                # Report the error but keep the other tools' results
+                error_message = f"Tool execution failed: {str(tool_result)}"
+                tool_results.append(
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": content_block.id,
+                        "content": error_message,
+                        "is_error": True,
+                    }
+                )
+            else:
+                tool_results.append(
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": content_block.id,
+                        "content": tool_result,
+                    }
+                )
+                has_successful_execution = True
 
         # Add tool results as user message
         if tool_results:
-            updated_messages.append({"role": "user", "content": tool_results})
+            messages.append({"role": "user", "content": tool_results})
 
         # Raise exception if no tools executed successfully
         if not has_successful_execution:
             raise Exception("All tool executions failed")
 
-        return updated_messages
+        return messages
+
+    @staticmethod
+    def _execute_tool_calls(response, tool_manager) -> List[Tuple[Any, Any]]:
+        """
+        Run a response's tool_use blocks concurrently on the shared executor.
+
+        The tool_use blocks are collected in a single pass over
+        response.content and dispatched straight to the executor.
+
+        Returns:
+            (tool_use block, result or the exception it raised) pairs in the
+            order Claude requested them
+        """
+        tool_calls = [block for block in response.content if block.type == "tool_use"]
+
+        def run(block):
+            try:
+                return block, tool_manager.execute_tool(block.name, **block.input)
+            except Exception as e:
+                return block, e
+
+        # A lone tool call gains nothing from a thread hop
+        if len(tool_calls) <= 1:
+            return [run(block) for block in tool_calls]
+
+        return list(_TOOL_EXECUTOR.map(run, tool_calls))
+
+    @staticmethod
+    async def _aexecute_tool_calls(response, tool_manager) -> List[Tuple[Any, Any]]:
+        """
+        Async counterpart of _execute_tool_calls: the tool_use blocks are
+        awaited together on the running event loop.
+
+        Returns:
+            (tool_use block, result or the exception it raised) pairs in the
+            order Claude requested them
+        """
+        tool_calls = [block for block in response.content if block.type == "tool_use"]
+        results = await asyncio.gather(
+            *(
+                tool_manager.aexecute_tool(block.name, **block.input)
+                for block in tool_calls
+            ),
+            return_exceptions=True,
+        )
+        return list(zip(tool_calls, results))
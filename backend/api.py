@@ -0,0 +1,99 @@
+"""
+API routes of the RAG system.
+
+Kept apart from app.py, which builds the RAG system and mounts the frontend
+at import, so the routes can be served by any app that sets
+app.state.rag_system.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+router = APIRouter()
+
+
+# Pydantic models for request/response
+class QueryRequest(BaseModel):
+    """Request model for course queries"""
+
+    query: str
+    session_id: Optional[str] = None
+
+
+class QueryResponse(BaseModel):
+    """Response model for course queries"""
+
+    answer: str
+    sources: List[
+        Union[str, Dict[str, Any]]
+    ]  # Support both old string format and new object format
+    session_id: str
+
+
+class CourseStats(BaseModel):
+    """Response model for course statistics"""
+
+    total_courses: int
+    course_titles: List[str]
+
+
+def get_rag_system(request: Request):
+    """Endpoint dependency returning the app's RAG system"""
+    return request.app.state.rag_system
+
+
+# API Endpoints
+
+
+@router.post("/api/query", response_model=QueryResponse)
+async def query_documents(request: QueryRequest, rag_system=Depends(get_rag_system)):
+    """Process a query and return response with sources"""
+    try:
+        # Create session if not provided
+        session_id = request.session_id
+        if not session_id:
+            session_id = rag_system.session_manager.create_session()
+
+        # Process query using RAG system
+        answer, sources = rag_system.query(request.query, session_id)
+
+        return QueryResponse(answer=answer, sources=sources, session_id=session_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/query/stream")
+async def query_documents_stream(
+    request: QueryRequest, rag_system=Depends(get_rag_system)
+):
+    """Process a query and stream the response as Server-Sent Events"""
+    session_id = request.session_id
+    if not session_id:
+        session_id = rag_system.session_manager.create_session()
+
+    def event_stream():
+        try:
+            for event in rag_system.query_stream(request.query, session_id):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+        yield f"data: {json.dumps({'type': 'done', 'session_id': session_id})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.get("/api/courses", response_model=CourseStats)
+async def get_course_stats(rag_system=Depends(get_rag_system)):
+    """Get course analytics and statistics"""
+    try:
+        analytics = rag_system.get_course_analytics()
+        return CourseStats(
+            total_courses=analytics["total_courses"],
+            course_titles=analytics["course_titles"],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
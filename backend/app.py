@@ -3,14 +3,13 @@ import warnings
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
 import os
-from typing import Any, Dict, List, Optional, Union
 
+from api import router
 from config import config
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
 from rag_system import RAGSystem
 
 # Initialize FastAPI app
@@ -29,66 +28,10 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Initialize RAG system
+# Initialize RAG system; the API routes reach it through app.state
 rag_system = RAGSystem(config)
-
-
-# Pydantic models for request/response
-class QueryRequest(BaseModel):
-    """Request model for course queries"""
-
-    query: str
-    session_id: Optional[str] = None
-
-
-class QueryResponse(BaseModel):
-    """Response model for course queries"""
-
-    answer: str
-    sources: List[
-        Union[str, Dict[str, Any]]
-    ]  # Support both old string format and new object format
-    session_id: str
-
-
-class CourseStats(BaseModel):
-    """Response model for course statistics"""
-
-    total_courses: int
-    course_titles: List[str]
-
-
-# API Endpoints
-
-
-@app.post("/api/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
-    """Process a query and return response with sources"""
-    try:
-        # Create session if not provided
-        session_id = request.session_id
-        if not session_id:
-            session_id = rag_system.session_manager.create_session()
-
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
-
-        return QueryResponse(answer=answer, sources=sources, session_id=session_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/api/courses", response_model=CourseStats)
-async def get_course_stats():
-    """Get course analytics and statistics"""
-    try:
-        analytics = rag_system.get_course_analytics()
-        return CourseStats(
-            total_courses=analytics["total_courses"],
-            course_titles=analytics["course_titles"],
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+app.state.rag_system = rag_system
+app.include_router(router)
 
 
 @app.on_event("startup")
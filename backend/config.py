@@ -23,6 +23,11 @@ class Config:
     CHUNK_OVERLAP: int = 100  # Characters to overlap between chunks
     MAX_RESULTS: int = 5  # Maximum search results to return
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
+    RESPONSE_CACHE_SIZE: int = 0  # Cached Claude responses to keep (0 disables)
+    INGEST_BATCH_SIZE: int = 500  # Chunks buffered per vector store insert
+    # Prefetch a search for the raw query; only hits when Claude searches
+    # the question verbatim, which its rewritten queries rarely do
+    SPECULATIVE_SEARCH: bool = False
 
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
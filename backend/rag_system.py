@@ -1,5 +1,6 @@
 import os
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from ai_generator import AIGenerator
 from document_processor import DocumentProcessor
@@ -8,22 +9,28 @@ from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from session_manager import SessionManager
 from vector_store import VectorStore
 
+# Shared pool for parsing course documents concurrently; file reads and
+# PDF/DOCX parsing overlap across files instead of running one after another
+_INGEST_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ingest")
+
 
 class RAGSystem:
     """Main orchestrator for the Retrieval-Augmented Generation system"""
 
-    def __init__(self, config):
+    def __init__(self, config, vector_store: Optional[VectorStore] = None):
         self.config = config
 
         # Initialize core components
         self.document_processor = DocumentProcessor(
             config.CHUNK_SIZE, config.CHUNK_OVERLAP
         )
-        self.vector_store = VectorStore(
+        self.vector_store = vector_store or VectorStore(
             config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
         )
         self.ai_generator = AIGenerator(
-            config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL
+            config.ANTHROPIC_API_KEY,
+            config.ANTHROPIC_MODEL,
+            config.RESPONSE_CACHE_SIZE,
         )
         self.session_manager = SessionManager(config.MAX_HISTORY)
 
@@ -50,11 +57,10 @@ class RAGSystem:
                 file_path
             )
 
-            # Add course metadata to vector store for semantic search
-            self.vector_store.add_course_metadata(course)
-
-            # Add course content chunks to vector store
-            self.vector_store.add_course_content(course_chunks)
+            # Add course metadata and content chunks to the vector store,
+            # embedding both in one batch
+            self.vector_store.add_course_bundle(course, course_chunks)
+            self._invalidate_caches()
 
             return course, len(course_chunks)
         except Exception as e:
@@ -81,6 +87,7 @@ class RAGSystem:
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
             self.vector_store.clear_all_data()
+            self._invalidate_caches()
 
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
@@ -89,36 +96,111 @@ class RAGSystem:
         # Get existing course titles to avoid re-processing
         existing_course_titles = set(self.vector_store.get_existing_course_titles())
 
-        # Process each file in the folder
-        for file_name in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, file_name)
-            if os.path.isfile(file_path) and file_name.lower().endswith(
-                (".pdf", ".docx", ".txt")
-            ):
-                try:
-                    # Check if this course might already exist
-                    # We'll process the document to get the course ID, but only add if new
-                    course, course_chunks = (
-                        self.document_processor.process_course_document(file_path)
-                    )
-
-                    if course and course.title not in existing_course_titles:
-                        # This is a new course - add it to the vector store
-                        self.vector_store.add_course_metadata(course)
-                        self.vector_store.add_course_content(course_chunks)
-                        total_courses += 1
-                        total_chunks += len(course_chunks)
-                        print(
-                            f"Added new course: {course.title} ({len(course_chunks)} chunks)"
-                        )
-                        existing_course_titles.add(course.title)
-                    elif course:
-                        print(f"Course already exists: {course.title} - skipping")
-                except Exception as e:
-                    print(f"Error processing {file_name}: {e}")
+        # Collect the course documents in the folder
+        file_names = [
+            file_name
+            for file_name in os.listdir(folder_path)
+            if file_name.lower().endswith((".pdf", ".docx", ".txt"))
+            and os.path.isfile(os.path.join(folder_path, file_name))
+        ]
+
+        # Parse every document in the pool; we still process each one to get
+        # the course ID, but only add it if new
+        futures = [
+            (
+                file_name,
+                _INGEST_EXECUTOR.submit(
+                    self.document_processor.process_course_document,
+                    os.path.join(folder_path, file_name),
+                ),
+            )
+            for file_name in file_names
+        ]
+
+        # New courses (with their chunk counts) and their chunks waiting to be
+        # written in one batch; local, so concurrent or failed ingests can't
+        # leave entries behind for each other
+        batch: List[Tuple[Course, int]] = []
+        chunk_buffer: List[CourseChunk] = []
+
+        # Results are consumed in submission order, so the duplicate check and
+        # vector store writes stay on this thread and deterministic
+        index_changed = False
+        for file_name, future in futures:
+            try:
+                course, course_chunks = future.result()
+            except Exception as e:
+                print(f"Error processing {file_name}: {e}")
+                continue
+
+            if course and course.title not in existing_course_titles:
+                # This is a new course - queue it for the vector store
+                batch.append((course, len(course_chunks)))
+                chunk_buffer.extend(course_chunks)
+                existing_course_titles.add(course.title)
+                if len(chunk_buffer) >= self.config.INGEST_BATCH_SIZE:
+                    index_changed = True
+                    written = self._flush_batch(batch, chunk_buffer)
+                    total_courses += len(written)
+                    total_chunks += sum(count for _, count in written)
+                    batch, chunk_buffer = [], []
+            elif course:
+                print(f"Course already exists: {course.title} - skipping")
+
+        if batch:
+            index_changed = True
+            written = self._flush_batch(batch, chunk_buffer)
+            total_courses += len(written)
+            total_chunks += sum(count for _, count in written)
+
+        # Even a failed batch may have stored some chunks
+        if index_changed:
+            self._invalidate_caches()
 
         return total_courses, total_chunks
 
+    def _invalidate_caches(self):
+        """
+        Drop memoized searches, outlines and answers after the index changes
+        """
+        self.search_tool.invalidate_cache()
+        self.outline_tool.invalidate_cache()
+        self.ai_generator.clear_response_cache()
+
+    def _flush_batch(
+        self, batch: List[Tuple[Course, int]], chunks: List[CourseChunk]
+    ) -> List[Tuple[Course, int]]:
+        """
+        Write a batch of new courses to the vector store, chunks first.
+
+        Catalog entries only go in once their chunks are stored, so a failed
+        write never leaves a course looking indexed; the next ingest retries it.
+
+        Args:
+            batch: New courses with their chunk counts
+            chunks: Every chunk of those courses
+
+        Returns:
+            (course, chunk count) for each course whose catalog entry landed
+        """
+        try:
+            self.vector_store.add_course_content(chunks)
+        except Exception as e:
+            titles = ", ".join(course.title for course, _ in batch)
+            print(f"Error writing courses {titles}: {e}")
+            return []
+
+        written = []
+        for course, chunk_count in batch:
+            try:
+                self.vector_store.add_course_metadata(course)
+            except Exception as e:
+                print(f"Error adding catalog entry for {course.title}: {e}")
+                continue
+            print(f"Added new course: {course.title} ({chunk_count} chunks)")
+            written.append((course, chunk_count))
+        return written
+
     def query(
         self, query: str, session_id: Optional[str] = None
     ) -> Tuple[str, List[str]]:
@@ -135,24 +217,28 @@ class RAGSystem:
         # Create prompt for the AI with clear instructions
         prompt = f"""Answer this question about course materials: {query}"""
 
+        # Search for the question as asked while Claude decides what to call
+        if self.config.SPECULATIVE_SEARCH:
+            self.search_tool.prefetch(query)
+
         # Get conversation history if session exists
         history = None
         if session_id:
-            history = self.session_manager.get_conversation_history(session_id)
+            history = self.session_manager.get_conversation_messages(session_id)
+
+        # Gather this request's sources apart from any other running request
+        tool_manager = self.tool_manager.scope()
 
         # Generate response using AI with tools
         response = self.ai_generator.generate_response(
             query=prompt,
             conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager,
+            tools=tool_manager.get_tool_definitions(),
+            tool_manager=tool_manager,
         )
 
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
-
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        # Get sources from this request's tool calls
+        sources = tool_manager.get_last_sources()
 
         # Update conversation history
         if session_id:
@@ -161,6 +247,87 @@ class RAGSystem:
         # Return response with sources from tool searches
         return response, sources
 
+    async def aquery(
+        self, query: str, session_id: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Async counterpart of query; a round's tool calls run concurrently.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Returns:
+            Tuple of (response, sources list)
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        if self.config.SPECULATIVE_SEARCH:
+            self.search_tool.prefetch(query)
+
+        history = None
+        if session_id:
+            history = self.session_manager.get_conversation_messages(session_id)
+
+        tool_manager = self.tool_manager.scope()
+        response = await self.ai_generator.agenerate_response(
+            query=prompt,
+            conversation_history=history,
+            tools=tool_manager.get_tool_definitions(),
+            tool_manager=tool_manager,
+        )
+
+        sources = tool_manager.get_last_sources()
+
+        if session_id:
+            self.session_manager.add_exchange(session_id, query, response)
+
+        return response, sources
+
+    def query_stream(
+        self, query: str, session_id: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Process a user query, streaming the answer as it is generated.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Yields:
+            {"type": "text", "text": ...} events for each answer chunk,
+            followed by a single {"type": "sources", "sources": [...]} event
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        if self.config.SPECULATIVE_SEARCH:
+            self.search_tool.prefetch(query)
+
+        history = None
+        if session_id:
+            history = self.session_manager.get_conversation_messages(session_id)
+
+        # Streams are iterated from the server's threadpool alongside other
+        # requests, so sources are gathered per stream
+        tool_manager = self.tool_manager.scope()
+
+        chunks = []
+        for text in self.ai_generator.generate_response_stream(
+            query=prompt,
+            conversation_history=history,
+            tools=tool_manager.get_tool_definitions(),
+            tool_manager=tool_manager,
+        ):
+            chunks.append(text)
+            yield {"type": "text", "text": text}
+
+        sources = tool_manager.get_last_sources()
+
+        if session_id:
+            self.session_manager.add_exchange(session_id, query, "".join(chunks))
+
+        yield {"type": "sources", "sources": sources}
+
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
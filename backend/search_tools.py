@@ -1,8 +1,21 @@
+import asyncio
+import copy
+import functools
+import json
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Protocol
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
 
 from vector_store import SearchResults, VectorStore
 
+# Background pool for speculative searches started before Claude asks for them
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+
+class _SearchError(Exception):
+    """Tool error message, raised so lru_cache doesn't keep it"""
+
 
 class Tool(ABC):
     """Abstract base class for all tools"""
@@ -17,38 +30,71 @@ class Tool(ABC):
         """Execute the tool with given parameters"""
         pass
 
+    async def aexecute(self, **kwargs) -> str:
+        """Execute the tool without blocking the event loop"""
+        return await asyncio.to_thread(self.execute, **kwargs)
+
+    def execute_with_sources(self, **kwargs) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Execute the tool and return its result with the sources of this call.
+
+        Tools whose calls may run concurrently should override this and build
+        sources per call; the default reads a last_sources attribute, which
+        is only safe when calls to the tool never overlap.
+        """
+        result = self.execute(**kwargs)
+        return result, list(getattr(self, "last_sources", None) or [])
+
+    async def aexecute_with_sources(self, **kwargs) -> Tuple[str, List[Dict[str, Any]]]:
+        """Async counterpart of execute_with_sources"""
+        return await asyncio.to_thread(self.execute_with_sources, **kwargs)
+
 
 class CourseSearchTool(Tool):
     """Tool for searching course content with semantic course name matching"""
 
+    # Static, so built once at class definition and shared by every instance
+    _DEFINITION: Dict[str, Any] = {
+        "name": "search_course_content",
+        "description": "Search course content, optionally filtered by course and lesson",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "What to search for",
+                },
+                "course_name": {
+                    "type": "string",
+                    "description": "Course title; partial matches work (e.g. 'MCP')",
+                },
+                "lesson_number": {
+                    "type": "integer",
+                    "description": "Lesson number to search within",
+                },
+            },
+            "required": ["query"],
+        },
+    }
+
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
-        self.last_sources = []  # Track sources from last search
+        # Sources of the last direct execute() call; ToolManager takes each
+        # call's own sources from execute_with_sources instead
+        self.last_sources = []
+        # Repeated searches skip the embedding + Chroma query; memoized per
+        # (generation, query, course_name, lesson_number). Re-indexing bumps
+        # the generation, so results computed before it are never served
+        self._search = functools.lru_cache(maxsize=128)(self._search_uncached)
+        self._generation = 0
+        # Prefetches still running, keyed like the cache; shared by request,
+        # tool and prefetch threads, so only touched under the lock
+        self._pending: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "search_course_content",
-            "description": "Search course materials with smart course name matching and lesson filtering",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "What to search for in the course content",
-                    },
-                    "course_name": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')",
-                    },
-                    "lesson_number": {
-                        "type": "integer",
-                        "description": "Specific lesson number to search within (e.g. 1, 2, 3)",
-                    },
-                },
-                "required": ["query"],
-            },
-        }
+        return self._DEFINITION
 
     def execute(
         self,
@@ -67,7 +113,109 @@ class CourseSearchTool(Tool):
         Returns:
             Formatted search results or error message
         """
+        text, self.last_sources = self.execute_with_sources(
+            query, course_name, lesson_number
+        )
+        return text
 
+    def execute_with_sources(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Run the search, returning its text and the sources of this call only.
+
+        Nothing is read back from instance state, so concurrent searches in
+        one round each keep their own sources.
+        """
+        key = self._cache_key(query, course_name, lesson_number)
+        with self._lock:
+            key = (self._generation, *key)
+            pending = self._pending.get(key)
+            # A prefetch still queued behind other prefetches would only delay
+            # this search, so drop it and search inline instead
+            if pending is not None and pending.cancel():
+                del self._pending[key]
+                pending = None
+
+        # Wait for a matching prefetch that is already running rather than
+        # running the search twice; if re-indexing cancels it meanwhile, the
+        # search below just runs
+        if pending is not None:
+            try:
+                pending.result()
+            except CancelledError:
+                pass
+
+        try:
+            text, sources = self._search(*key)
+        except _SearchError as e:
+            # Errors may be transient, so they are reported but not memoized
+            return str(e), []
+
+        return text, list(sources)
+
+    def prefetch(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ):
+        """
+        Start a search in the background so a matching execute() call is
+        served from the cache instead of waiting on the vector store.
+
+        Only an execute() with the same filters and the same query (up to
+        whitespace) benefits. Claude usually rewrites the user's question
+        before searching, so prefetching the raw question has a low hit
+        rate; a miss just costs one spare vector store query.
+        """
+        key = self._cache_key(query, course_name, lesson_number)
+        with self._lock:
+            key = (self._generation, *key)
+            # Submitted under the lock so _warm can't finish and pop the key
+            # before it is recorded
+            if key not in self._pending:
+                self._pending[key] = _PREFETCH_EXECUTOR.submit(self._warm, key)
+
+    def _warm(self, key: tuple):
+        """Populate the search cache for key; errors are left to execute()"""
+        try:
+            # Skip prefetches the index has changed under since they queued
+            if key[0] == self._generation:
+                self._search(*key)
+        except Exception:
+            # execute() runs the search itself and reports the failure
+            pass
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    @staticmethod
+    def _cache_key(
+        query: str, course_name: Optional[str], lesson_number: Optional[int]
+    ) -> tuple:
+        """Search cache key; whitespace differences in the query don't matter"""
+        return " ".join(query.split()), course_name, lesson_number
+
+    def _search_uncached(
+        self,
+        generation: int,
+        query: str,
+        course_name: Optional[str],
+        lesson_number: Optional[int],
+    ) -> Tuple[str, Tuple[Dict[str, Any], ...]]:
+        """
+        Run the search and format it; generation only keys the cache.
+
+        Returns:
+            Tuple of (formatted text, sources for the UI)
+
+        Raises:
+            _SearchError: the vector store reported an error
+        """
         # Use the vector store's unified search interface
         results = self.store.search(
             query=query, course_name=course_name, lesson_number=lesson_number
@@ -75,7 +223,7 @@ class CourseSearchTool(Tool):
 
         # Handle errors
         if results.error:
-            return results.error
+            raise _SearchError(results.error)
 
         # Handle empty results
         if results.is_empty():
@@ -84,16 +232,37 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            return f"No relevant content found{filter_info}.", ()
 
         # Format and return results
-        return self._format_results(results)
-
-    def _format_results(self, results: SearchResults) -> str:
-        """Format search results with course and lesson context"""
+        text, sources = self._format_results_with_sources(results)
+        return text, tuple(sources)
+
+    def invalidate_cache(self):
+        """Drop memoized searches; call whenever course content is re-indexed"""
+        with self._lock:
+            self._generation += 1
+            # Queued prefetches are cancelled; running ones finish into the
+            # old generation, which nothing reads any more
+            for pending in self._pending.values():
+                pending.cancel()
+            self._pending.clear()
+        self._search.cache_clear()
+
+    def _format_results_with_sources(
+        self, results: SearchResults
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Format search results, returning the text and its UI sources"""
         formatted = []
         sources = []  # Track sources for the UI
 
+        # Resolve lesson links for every result with a single catalog lookup
+        link_map = self._get_lesson_links(
+            meta.get("course_title", "unknown")
+            for meta in results.metadata
+            if meta.get("lesson_number") is not None
+        )
+
         for doc, meta in zip(results.documents, results.metadata):
             course_title = meta.get("course_title", "unknown")
             lesson_num = meta.get("lesson_number")
@@ -105,7 +274,7 @@ class CourseSearchTool(Tool):
             header += "]"
 
             # Get lesson link for this specific lesson
-            lesson_link = self._get_lesson_link(course_title, lesson_num)
+            lesson_link = link_map.get((course_title, lesson_num))
 
             # Track source for the UI - now with link data
             source_data = {"text": course_title, "link": None}
@@ -117,63 +286,68 @@ class CourseSearchTool(Tool):
 
             formatted.append(f"{header}\n{doc}")
 
-        # Store sources for retrieval
-        self.last_sources = sources
-
-        return "\n\n".join(formatted)
+        return "\n\n".join(formatted), sources
 
-    def _get_lesson_link(
-        self, course_title: str, lesson_number: Optional[int]
-    ) -> Optional[str]:
-        """Get lesson link from course catalog"""
-        if lesson_number is None:
-            return None
+    def _get_lesson_links(
+        self, course_titles: Iterable[str]
+    ) -> Dict[Tuple[str, int], Optional[str]]:
+        """Map (course title, lesson number) to lesson link for the given courses"""
+        unique_titles = list(set(course_titles))
+        if not unique_titles:
+            return {}
 
+        link_map = {}
         try:
-            import json
+            # Query course catalog once for all courses
+            results = self.store.course_catalog.get(ids=unique_titles)
 
-            # Query course catalog to get lesson metadata
-            results = self.store.course_catalog.get(ids=[course_title])
+            if results and results.get("metadatas"):
+                for course_title, metadata in zip(results["ids"], results["metadatas"]):
+                    lessons_json = metadata.get("lessons_json")
+                    if not lessons_json:
+                        continue
 
-            if results and "metadatas" in results and results["metadatas"]:
-                metadata = results["metadatas"][0]
-                lessons_json = metadata.get("lessons_json")
-
-                if lessons_json:
-                    lessons = json.loads(lessons_json)
-                    # Find the specific lesson
-                    for lesson in lessons:
-                        if lesson.get("lesson_number") == lesson_number:
-                            return lesson.get("lesson_link")
+                    for lesson in json.loads(lessons_json):
+                        link_map[(course_title, lesson.get("lesson_number"))] = (
+                            lesson.get("lesson_link")
+                        )
 
         except Exception as e:
             print(f"Error retrieving lesson link: {e}")
 
-        return None
+        return link_map
 
 
 class CourseOutlineTool(Tool):
     """Tool for getting course outline with title, link, and complete lesson list"""
 
+    # Static, so built once at class definition and shared by every instance
+    _DEFINITION: Dict[str, Any] = {
+        "name": "get_course_outline",
+        "description": "Get a course's title, link and lesson list",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "course_name": {
+                    "type": "string",
+                    "description": "Course title; partial matches work (e.g. 'MCP')",
+                }
+            },
+            "required": ["course_name"],
+        },
+    }
+
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
+        # Outlines only change at ingest time, so memoize the semantic name
+        # resolution and catalog fetch per course_name until invalidated
+        self._resolve_and_fetch = functools.lru_cache(maxsize=256)(
+            self._resolve_and_fetch_uncached
+        )
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "get_course_outline",
-            "description": "Get course outline with title, link, and complete lesson list",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "course_name": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')",
-                    }
-                },
-                "required": ["course_name"],
-            },
-        }
+        return self._DEFINITION
 
     def execute(self, course_name: str) -> str:
         """
@@ -185,33 +359,19 @@ class CourseOutlineTool(Tool):
         Returns:
             Formatted course outline or error message
         """
-        # Resolve course name to exact title
-        course_title = self.store._resolve_course_name(course_name)
-        if not course_title:
-            return f"No course found matching '{course_name}'"
-
         try:
-            # Get course metadata from catalog
-            results = self.store.course_catalog.get(ids=[course_title])
+            course_title, metadata, lessons = self._resolve_and_fetch(course_name)
 
-            if not results or not results.get("metadatas") or not results["metadatas"]:
+            if not metadata:
                 return f"Course metadata not found for '{course_title}'"
 
-            metadata = results["metadatas"][0]
-
             # Extract course information
             title = metadata.get("title", course_title)
             course_link = metadata.get("course_link", "No link available")
-            lessons_json = metadata.get("lessons_json")
 
-            if not lessons_json:
+            if lessons is None:
                 return f"No lesson information available for '{title}'"
 
-            # Parse lessons data
-            import json
-
-            lessons = json.loads(lessons_json)
-
             # Format the outline
             formatted_outline = [f"**Course:** {title}"]
             formatted_outline.append(f"**Course Link:** {course_link}")
@@ -224,15 +384,58 @@ class CourseOutlineTool(Tool):
 
             return "\n".join(formatted_outline)
 
+        except _SearchError as e:
+            return str(e)
         except Exception as e:
             return f"Error retrieving course outline: {str(e)}"
 
+    def _resolve_and_fetch_uncached(
+        self, course_name: str
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[list]]:
+        """
+        Resolve a course name and load its catalog entry.
+
+        Returns:
+            Tuple of (course title, catalog metadata, parsed lessons); trailing
+            entries are None when the course's data is missing
+
+        Raises:
+            _SearchError: no course matched the name
+        """
+        course_title = self.store._resolve_course_name(course_name)
+        if not course_title:
+            # Raised, not memoized: resolution turns store errors into None,
+            # and a transient failure mustn't read as "not found" until the
+            # next ingest
+            raise _SearchError(f"No course found matching '{course_name}'")
+
+        results = self.store.course_catalog.get(ids=[course_title])
+        if not results or not results.get("metadatas") or not results["metadatas"]:
+            return course_title, None, None
+
+        metadata = results["metadatas"][0]
+        lessons_json = metadata.get("lessons_json")
+        lessons = json.loads(lessons_json) if lessons_json else None
+        return course_title, metadata, lessons
+
+    def invalidate_cache(self):
+        """Drop memoized outlines; call whenever course metadata is re-indexed"""
+        self._resolve_and_fetch.cache_clear()
+
 
 class ToolManager:
     """Manages available tools for the AI"""
 
     def __init__(self):
         self.tools = {}
+        self._tool_definitions = {}
+        # Definitions are built once at registration, not on every query; a
+        # tuple so callers can't append to or reorder the shared cache
+        self._definitions_cache: Tuple[Dict[str, Any], ...] = ()
+        # Sources gathered as tools run, so reading them is a single lookup;
+        # the lock covers a round's tool calls finishing on several threads
+        self._last_sources: list = []
+        self._sources_lock = threading.Lock()
 
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -241,28 +444,56 @@ class ToolManager:
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
         self.tools[tool_name] = tool
+        self._tool_definitions[tool_name] = tool_def
+        self._definitions_cache = tuple(self._tool_definitions.values())
 
-    def get_tool_definitions(self) -> list:
+    def get_tool_definitions(self) -> Tuple[Dict[str, Any], ...]:
         """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        return self._definitions_cache
+
+    def scope(self) -> "ToolManager":
+        """
+        A manager running this one's tools but gathering its own sources, so
+        each request sees only the sources of its own tool calls even while
+        other requests use the same tools. Register tools on the parent.
+        """
+        scoped = copy.copy(self)
+        scoped._last_sources = []
+        scoped._sources_lock = threading.Lock()
+        return scoped
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
-        if tool_name not in self.tools:
+        tool = self.tools.get(tool_name)
+        if tool is None:
             return f"Tool '{tool_name}' not found"
 
-        return self.tools[tool_name].execute(**kwargs)
+        result, sources = tool.execute_with_sources(**kwargs)
+        self.record_sources(sources)
+        return result
+
+    async def aexecute_tool(self, tool_name: str, **kwargs) -> str:
+        """Async counterpart of execute_tool"""
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            return f"Tool '{tool_name}' not found"
+
+        result, sources = await tool.aexecute_with_sources(**kwargs)
+        self.record_sources(sources)
+        return result
+
+    def record_sources(self, sources: Optional[Iterable[Dict[str, Any]]]):
+        """Append one tool call's sources to those gathered since the reset"""
+        if sources:
+            with self._sources_lock:
+                self._last_sources.extend(sources)
 
     def get_last_sources(self) -> list:
-        """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
-                return tool.last_sources
-        return []
+        """Get a copy of the sources from every tool call since the last reset"""
+        with self._sources_lock:
+            return list(self._last_sources)
 
     def reset_sources(self):
-        """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+        """Forget the sources gathered so far"""
+        with self._sources_lock:
+            self._last_sources = []
@@ -1,31 +1,47 @@
 """
 Shared fixtures and configuration for RAG system tests
 """
+import httpx
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
-from typing import Generator, Dict, Any, List
-import tempfile
+import pytest_asyncio
+from unittest.mock import Mock, create_autospec, patch
+from typing import Dict, Any, List
 import os
-import shutil
-from pathlib import Path
+import re
+import warnings
+from types import SimpleNamespace
+from uuid import uuid4
 
 import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+# Only Config and the API routes are needed here; the patch fixtures below
+# target the other backend modules by string, so collection doesn't import
+# chromadb, sentence_transformers or anthropic
+from api import get_rag_system, router
 from config import Config
-from rag_system import RAGSystem
-from vector_store import VectorStore
-from ai_generator import AIGenerator
-from session_manager import SessionManager
-from search_tools import ToolManager
+from fastapi import FastAPI
+
+# One-off migration script, not a test module
+collect_ignore_glob = ["fix_models.py"]
+
+
+def pytest_configure(config):
+    """Disable ChromaDB persistence and telemetry once for the whole session"""
+    os.environ["CHROMA_ENABLE_PERSISTENCE"] = "false"
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"
+    os.environ["CHROMA_TELEMETRY"] = "False"
+    # Process-wide filter; the resource tracker warns at interpreter exit,
+    # outside any test, so the ini filterwarnings don't cover it
+    warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
 
 @pytest.fixture
-def temp_dir() -> Generator[str, None, None]:
-    """Create a temporary directory for tests"""
-    temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    shutil.rmtree(temp_dir)
+def temp_dir(tmp_path_factory, request) -> str:
+    """Create a per-test subdirectory of the session's temp tree"""
+    # The base directory is already per xdist worker and pytest prunes old
+    # ones itself, so there is no per-test mkdtemp/rmtree
+    name = re.sub(r"\W", "_", request.node.name)[:30]
+    return str(tmp_path_factory.mktemp(name, numbered=True))
 
 
 @pytest.fixture
@@ -40,35 +56,149 @@ def test_config(temp_dir: str) -> Config:
     return config
 
 
+@pytest.fixture(scope="session")
+def shared_embedding_fn():
+    """
+    Sentence-transformer embedding function, loading the model once; 64
+    dimensions are plenty to rank a handful of test documents
+    """
+    import numpy as np
+    from chromadb.api.types import EmbeddingFunction
+    from sentence_transformers import SentenceTransformer
+
+    class TruncatedEmbedding(EmbeddingFunction):
+        def __init__(self):
+            # Our own model instance: Chroma caches models by name alone and
+            # would hand back a full-width one loaded elsewhere
+            self.model = SentenceTransformer(
+                Config().EMBEDDING_MODEL, truncate_dim=64
+            )
+
+        def __call__(self, input):
+            return [
+                np.asarray(embedding, dtype=np.float32)
+                for embedding in self.model.encode(list(input))
+            ]
+
+    return TruncatedEmbedding()
+
+
+@pytest.fixture(scope="session")
+def hash_embedding_fn():
+    """Deterministic hash-seeded vectors for tests that never rank by meaning"""
+    import hashlib
+
+    import numpy as np
+    from chromadb.api.types import EmbeddingFunction
+
+    class HashEmbedding(EmbeddingFunction):
+        def __init__(self):
+            pass
+
+        def __call__(self, input):
+            return [
+                np.random.default_rng(
+                    int.from_bytes(hashlib.md5(text.encode()).digest()[:8], "little")
+                ).random(64, dtype=np.float32)
+                for text in input
+            ]
+
+    return HashEmbedding()
+
+
+@pytest.fixture(scope="session")
+def shared_chroma_client():
+    """In-memory ChromaDB client shared by every real vector store test"""
+    import chromadb
+    from chromadb.config import Settings
+
+    return chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+
+
 @pytest.fixture
-def mock_anthropic_client():
-    """Mock Anthropic client for AI generation"""
-    with patch('anthropic.Anthropic') as mock_client:
-        mock_instance = Mock()
-        mock_client.return_value = mock_instance
-        
-        # Mock the messages.create method
-        mock_response = Mock()
-        mock_response.content = [Mock(text="Test AI response")]
-        mock_instance.messages.create.return_value = mock_response
-        
-        yield mock_instance
+def isolated_vector_store(shared_chroma_client, shared_embedding_fn):
+    """Real VectorStore on the shared client, in collections of its own"""
+    from vector_store import VectorStore
+
+    store = VectorStore(
+        "",
+        Config().EMBEDDING_MODEL,
+        client=shared_chroma_client,
+        embedding_function=shared_embedding_fn,
+        collection_prefix=f"test_{uuid4().hex}_",
+    )
+    yield store
+    for name in (store.catalog_name, store.content_name):
+        shared_chroma_client.delete_collection(name)
+
+
+# Mock prototypes: canned attribute configuration built once at import and
+# applied with Mock(**proto), so fixtures skip step-by-step attribute wiring.
+# (copy.copy of a configured Mock would share its child mocks, and with them
+# call counts, between copies.)
+_ANTHROPIC_PROTO = {
+    "messages.create.return_value": SimpleNamespace(
+        stop_reason="end_turn",
+        content=[SimpleNamespace(type="text", text="Test AI response")]
+    ),
+}
+_SENTENCE_TRANSFORMER_PROTO = {
+    "encode.return_value": [[0.1, 0.2, 0.3, 0.4, 0.5] for _ in range(10)],
+}
+_AI_GENERATOR_PROTO = {"generate.return_value": "Test AI response"}
+_SESSION_MANAGER_PROTO = {
+    "create_session.return_value": "test-session-id",
+    "get_conversation_history.return_value": [],
+    "add_message.return_value": None,
+}
+_TOOL_MANAGER_PROTO = {"search_courses.return_value": ["Test Course"]}
+_RAG_SYSTEM_PROTO = {
+    "query.return_value": (
+        "Test response",
+        [{"course": "Test Course", "lesson": "Lesson 1", "text": "Test content"}]
+    ),
+    "get_course_analytics.return_value": {
+        "total_courses": 1,
+        "course_titles": ["Test Course"]
+    },
+    "add_course_folder.return_value": (1, 2),  # 1 course, 2 chunks
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def anthropic_patch():
+    """Patch the Anthropic constructor once for the whole session"""
+    with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
+        mock_anthropic.return_value = Mock()
+        yield mock_anthropic, mock_anthropic.return_value
 
 
 @pytest.fixture
-def mock_sentence_transformer():
+def mock_anthropic(anthropic_patch):
+    """The patched Anthropic constructor and its client, reset for each test"""
+    mock_anthropic, mock_client = anthropic_patch
+    mock_anthropic.reset_mock(return_value=True, side_effect=True)
+    mock_client.reset_mock(return_value=True, side_effect=True)
+    mock_anthropic.return_value = mock_client
+    return mock_anthropic
+
+
+@pytest.fixture(scope="module")
+def mock_anthropic_client(module_mocker):
+    """Mock Anthropic client for AI generation"""
+    return module_mocker.patch('anthropic.Anthropic', return_value=Mock(**_ANTHROPIC_PROTO)).return_value
+
+
+@pytest.fixture(scope="module")
+def mock_sentence_transformer(module_mocker):
     """Mock SentenceTransformer for embeddings"""
-    with patch('sentence_transformers.SentenceTransformer') as mock_transformer:
-        mock_instance = Mock()
-        mock_transformer.return_value = mock_instance
-        
-        # Mock encode method to return dummy embeddings
-        mock_instance.encode.return_value = [[0.1, 0.2, 0.3, 0.4, 0.5] for _ in range(10)]
-        
-        yield mock_instance
+    return module_mocker.patch(
+        'sentence_transformers.SentenceTransformer',
+        return_value=Mock(**_SENTENCE_TRANSFORMER_PROTO)
+    ).return_value
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_course_data() -> Dict[str, Any]:
     """Sample course data for testing"""
     return {
@@ -86,7 +216,7 @@ def sample_course_data() -> Dict[str, Any]:
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_chunks() -> List[Dict[str, Any]]:
     """Sample chunks for testing vector store"""
     return [
@@ -107,96 +237,53 @@ def sample_chunks() -> List[Dict[str, Any]]:
     ]
 
 
-@pytest.fixture
-def mock_vector_store(test_config: Config, sample_chunks: List[Dict[str, Any]]):
+@pytest.fixture(scope="module")
+def mock_vector_store(module_mocker, sample_chunks: List[Dict[str, Any]]):
     """Mock vector store with sample data"""
-    with patch('vector_store.VectorStore') as mock_vs:
-        mock_instance = Mock()
-        mock_vs.return_value = mock_instance
-        
-        # Mock search method
-        mock_instance.search.return_value = sample_chunks[:2]  # Return first 2 chunks
-        mock_instance.get_collection_stats.return_value = {
+    mock_instance = Mock(**{
+        "search.return_value": sample_chunks[:2],  # Return first 2 chunks
+        "get_collection_stats.return_value": {
             "total_chunks": len(sample_chunks),
             "courses": ["Test Course"]
-        }
-        
-        yield mock_instance
+        },
+    })
+    module_mocker.patch('vector_store.VectorStore', return_value=mock_instance)
+    return mock_instance
 
 
-@pytest.fixture
-def mock_ai_generator(mock_anthropic_client):
+@pytest.fixture(scope="module")
+def mock_ai_generator(module_mocker, mock_anthropic_client):
     """Mock AI generator"""
-    with patch('ai_generator.AIGenerator') as mock_ai:
-        mock_instance = Mock()
-        mock_ai.return_value = mock_instance
-        
-        mock_instance.generate.return_value = "Test AI response"
-        
-        yield mock_instance
+    return module_mocker.patch('ai_generator.AIGenerator', return_value=Mock(**_AI_GENERATOR_PROTO)).return_value
 
 
-@pytest.fixture
-def mock_session_manager():
+@pytest.fixture(scope="module")
+def mock_session_manager(module_mocker):
     """Mock session manager"""
-    with patch('session_manager.SessionManager') as mock_sm:
-        mock_instance = Mock()
-        mock_sm.return_value = mock_instance
-        
-        mock_instance.create_session.return_value = "test-session-id"
-        mock_instance.get_conversation_history.return_value = []
-        mock_instance.add_message.return_value = None
-        
-        yield mock_instance
+    return module_mocker.patch('session_manager.SessionManager', return_value=Mock(**_SESSION_MANAGER_PROTO)).return_value
 
 
-@pytest.fixture
-def mock_tool_manager():
+@pytest.fixture(scope="module")
+def mock_tool_manager(module_mocker):
     """Mock tool manager"""
-    with patch('search_tools.ToolManager') as mock_tm:
-        mock_instance = Mock()
-        mock_tm.return_value = mock_instance
-        
-        mock_instance.search_courses.return_value = ["Test Course"]
-        
-        yield mock_instance
+    return module_mocker.patch('search_tools.ToolManager', return_value=Mock(**_TOOL_MANAGER_PROTO)).return_value
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_rag_system(
-    test_config: Config,
+    module_mocker,
     mock_vector_store,
     mock_ai_generator, 
     mock_session_manager,
     mock_tool_manager
 ):
     """Mock RAG system with all dependencies"""
-    with patch('rag_system.RAGSystem') as mock_rag:
-        mock_instance = Mock()
-        mock_rag.return_value = mock_instance
-        
-        # Mock the main query method
-        mock_instance.query.return_value = (
-            "Test response",
-            [{"course": "Test Course", "lesson": "Lesson 1", "text": "Test content"}]
-        )
-        
-        # Mock analytics method
-        mock_instance.get_course_analytics.return_value = {
-            "total_courses": 1,
-            "course_titles": ["Test Course"]
-        }
-        
-        # Mock add_course_folder method
-        mock_instance.add_course_folder.return_value = (1, 2)  # 1 course, 2 chunks
-        
-        # Mock session manager property
-        mock_instance.session_manager = mock_session_manager
-        
-        yield mock_instance
+    mock_instance = Mock(session_manager=mock_session_manager, **_RAG_SYSTEM_PROTO)
+    module_mocker.patch('rag_system.RAGSystem', return_value=mock_instance)
+    return mock_instance
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_query_request() -> Dict[str, Any]:
     """Sample API query request"""
     return {
@@ -205,7 +292,7 @@ def sample_query_request() -> Dict[str, Any]:
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_query_response() -> Dict[str, Any]:
     """Sample API query response"""
     return {
@@ -221,7 +308,7 @@ def sample_query_response() -> Dict[str, Any]:
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_course_stats() -> Dict[str, Any]:
     """Sample course statistics response"""
     return {
@@ -230,6 +317,92 @@ def sample_course_stats() -> Dict[str, Any]:
     }
 
 
+def create_test_app():
+    """Create a test FastAPI app without static file mounting"""
+    # Create test app without static file mounting
+    app = FastAPI(title="Course Materials RAG System - Test", root_path="")
+
+    # No TrustedHost/CORS middleware: no test exercises host checks or
+    # preflight, so every request would pay for two irrelevant layers
+
+    # Placeholder RAG system; the routes get it through Depends(get_rag_system),
+    # so the rag_mock fixture swaps in an autospec'd mock without a rebuild
+    app.state.rag_system = Mock()
+
+    # The shipped API routes, so tests exercise the real endpoint code
+    app.include_router(router)
+
+    @app.get("/")
+    async def read_root():
+        return {"message": "RAG System API", "status": "running"}
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def test_app():
+    """Test FastAPI app, built once per session; tests share its RAG mock"""
+    return create_test_app()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient(test_app):
+    """Async client shared by the whole session on one event loop"""
+    # Talks to the app in-process on the test's own loop, without the
+    # thread hop TestClient makes for every request
+    transport = httpx.ASGITransport(app=test_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def _cached_rag():
+    """Autospec'd RAGSystem mock, built once since autospec is slow"""
+    # Imported here so collecting non-API tests doesn't pull in RAGSystem's
+    # heavy dependencies
+    from rag_system import RAGSystem
+    from session_manager import SessionManager
+
+    rag = create_autospec(RAGSystem, instance=True)
+    # Set in RAGSystem.__init__, so the class spec doesn't know about it
+    rag.session_manager = create_autospec(SessionManager, instance=True)
+    return rag
+
+
+@pytest.fixture
+def rag_mock(test_app, _cached_rag):
+    """Clean autospec'd RAG mock, injected into the test app's endpoints"""
+    # Reset rather than copy.copy: a copied mock shares its child mocks, and
+    # with them call counts and return values
+    _cached_rag.reset_mock(return_value=True, side_effect=True)
+    test_app.dependency_overrides[get_rag_system] = lambda: _cached_rag
+    yield _cached_rag
+    test_app.dependency_overrides.pop(get_rag_system, None)
+
+
+# Module-scoped mocks are shared across tests; reset them so call counts
+# and side effects never leak from one test into the next
+MODULE_MOCK_FIXTURES = (
+    "mock_anthropic_client",
+    "mock_sentence_transformer",
+    "mock_vector_store",
+    "mock_ai_generator",
+    "mock_session_manager",
+    "mock_tool_manager",
+    "mock_rag_system",
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_module_mocks(request):
+    """Reset the shared mocks a test requested before it runs"""
+    for name in MODULE_MOCK_FIXTURES:
+        if name in request.fixturenames:
+            request.getfixturevalue(name).reset_mock()
+
+
 # Test data files
 @pytest.fixture
 def create_test_docs(temp_dir: str) -> str:
@@ -252,16 +425,16 @@ This covers advanced topics and concepts.
     return docs_dir
 
 
-# Common mock patches
 @pytest.fixture(autouse=True)
-def mock_warnings():
-    """Automatically mock warnings to avoid noise in tests"""
-    with patch('warnings.filterwarnings'):
-        yield
-
-
-@pytest.fixture
-def no_chroma_persistence():
-    """Disable ChromaDB persistence for tests"""
-    with patch.dict(os.environ, {"CHROMA_ENABLE_PERSISTENCE": "false"}):
-        yield
\ No newline at end of file
+def clear_anthropic_client_cache():
+    """Drop pooled Anthropic clients so patched constructors apply per test"""
+    # Tests that never import ai_generator have no pool to clear
+    ai_generator = sys.modules.get("ai_generator")
+    if ai_generator is not None:
+        ai_generator._CLIENT_CACHE.clear()
+        ai_generator._ASYNC_CLIENT_CACHE.clear()
+    yield
+    ai_generator = sys.modules.get("ai_generator")
+    if ai_generator is not None:
+        ai_generator._CLIENT_CACHE.clear()
+        ai_generator._ASYNC_CLIENT_CACHE.clear()
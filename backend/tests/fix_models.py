@@ -1,63 +1,56 @@
 #!/usr/bin/env python3
 """Script to fix Pydantic model usage in test files"""
 
-import os
 import re
+from pathlib import Path
+
+# All three constructor patterns are fused so each file is scanned once:
+#   CourseChunk("title", number, index, "content")
+#   Course("title", "instructor", "link", lessons)
+#   Lesson(number, "title", "link")
+_COMBINED = re.compile(
+    r'CourseChunk\("([^"]+)",\s*(\d+),\s*(\d+),\s*"([^"]+)"\)'
+    r'|Course\("([^"]+)",\s*"([^"]*)",\s*"([^"]*)",\s*(\[.*?\])\)'
+    r'|Lesson\((\d+),\s*"([^"]+)",\s*"([^"]*)"\)',
+    re.DOTALL,
+)
+
+
+def _sub(match):
+    """Rewrite one positional constructor call using keyword arguments"""
+    g = match.groups()
+    if g[0] is not None:
+        return (
+            f'CourseChunk(course_title="{g[0]}", lesson_number={g[1]}, '
+            f'chunk_index={g[2]}, content="{g[3]}")'
+        )
+    if g[4] is not None:
+        # The lessons list is consumed by this match, so fix its Lesson calls too
+        lessons = _COMBINED.sub(_sub, g[7])
+        return (
+            f'Course(title="{g[4]}", instructor="{g[5]}", '
+            f'course_link="{g[6]}", lessons={lessons})'
+        )
+    return f'Lesson(lesson_number={g[8]}, title="{g[9]}", lesson_link="{g[10]}")'
+
+
+def fix_model_usage(content):
+    """Fix CourseChunk, Course and Lesson constructor calls in one pass"""
+    return _COMBINED.sub(_sub, content)
+
+
+def fix_file(path):
+    """Fix a single file, writing it back only if something changed"""
+    original_content = path.read_text()
+    content = fix_model_usage(original_content)
 
-
-def fix_course_chunk_usage(content):
-    """Fix CourseChunk constructor calls"""
-    # Pattern: CourseChunk("title", number, index, "content")
-    pattern = r'CourseChunk\("([^"]+)",\s*(\d+),\s*(\d+),\s*"([^"]+)"\)'
-    replacement = r'CourseChunk(course_title="\1", lesson_number=\2, chunk_index=\3, content="\4")'
-    return re.sub(pattern, replacement, content)
-
-
-def fix_course_usage(content):
-    """Fix Course constructor calls"""
-    # Pattern: Course("title", "instructor", "link", lessons)
-    pattern = r'Course\("([^"]+)",\s*"([^"]*)",\s*"([^"]*)",\s*(\[.*?\])\)'
-    replacement = r'Course(title="\1", instructor="\2", course_link="\3", lessons=\4)'
-    return re.sub(pattern, replacement, content)
-
-
-def fix_lesson_usage(content):
-    """Fix Lesson constructor calls"""
-    # Pattern: Lesson(number, "title", "link")
-    pattern = r'Lesson\((\d+),\s*"([^"]+)",\s*"([^"]*)"\)'
-    replacement = r'Lesson(lesson_number=\1, title="\2", lesson_link="\3")'
-    return re.sub(pattern, replacement, content)
-
-
-def fix_file(filepath):
-    """Fix a single file"""
-    with open(filepath, "r") as f:
-        content = f.read()
-
-    original_content = content
-
-    # Apply fixes
-    content = fix_course_chunk_usage(content)
-    content = fix_course_usage(content)
-    content = fix_lesson_usage(content)
-
-    # Only write if changes were made
     if content != original_content:
-        with open(filepath, "w") as f:
-            f.write(content)
-        print(f"Fixed {filepath}")
+        path.write_text(content)
+        print(f"Fixed {path}")
     else:
-        print(f"No changes needed for {filepath}")
+        print(f"No changes needed for {path}")
 
 
 if __name__ == "__main__":
-    test_files = [
-        "test_vector_store.py",
-        "test_rag_system.py",
-        "test_course_search_tool.py",
-    ]
-
-    for filename in test_files:
-        filepath = os.path.join("tests", filename)
-        if os.path.exists(filepath):
-            fix_file(filepath)
+    for path in sorted(Path("tests").glob("test_*.py")):
+        fix_file(path)
@@ -1,18 +1,68 @@
-import os
-import sys
-from unittest.mock import MagicMock, Mock, patch
+import asyncio
+import threading
+from dataclasses import dataclass
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
+from ai_generator import AIGenerator
+from search_tools import Tool, ToolManager
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+MOCK_RESPONSE = (
+    "API key not configured. Please set your Anthropic API key to use this service."
+)
 
-from ai_generator import AIGenerator
+
+@dataclass(frozen=True)
+class TextBlock:
+    """Claude text content block; cheaper than a Mock that only exposes .text"""
+
+    text: str
+    type: str = "text"
+
+
+def _tool_use_block(name, input_, id_):
+    """Build a Claude tool_use content block"""
+    return SimpleNamespace(type="tool_use", name=name, input=input_, id=id_)
+
+
+def _response(*content, stop_reason=None):
+    """Build a Claude message; stop_reason defaults from the content blocks"""
+    if stop_reason is None:
+        has_tool_use = any(block.type == "tool_use" for block in content)
+        stop_reason = "tool_use" if has_tool_use else "end_turn"
+    return SimpleNamespace(stop_reason=stop_reason, content=list(content))
+
+
+class SourcedTool(Tool):
+    """Tool whose every call cites one lesson"""
+
+    SOURCE = {"text": "Test Course - Lesson 1", "link": "http://example.com/1"}
+
+    def get_tool_definition(self):
+        return {"name": "search_tool", "description": "Search"}
+
+    def execute(self, **kwargs):
+        return "Search result"
+
+    def execute_with_sources(self, **kwargs):
+        return self.execute(**kwargs), [self.SOURCE]
+
+
+@pytest.fixture(scope="module")
+def mock_mode_generator():
+    """A single mock-mode AIGenerator shared by the no-API-key tests"""
+    return AIGenerator("", "claude-sonnet-4-20250514")
 
 
 class TestAIGenerator:
     """Test cases for AIGenerator class"""
 
+    @pytest.fixture(autouse=True)
+    def mock_client(self, mock_anthropic):
+        """Client returned by the session's patched constructor"""
+        return mock_anthropic.return_value
+
     def test_initialization_with_valid_api_key(self):
         """Test AIGenerator initializes correctly with valid API key"""
         generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
@@ -21,45 +71,61 @@ class TestAIGenerator:
         assert generator.use_mock == False
         assert hasattr(generator, "client")
 
-    def test_initialization_without_api_key(self):
+    def test_client_shared_across_instances(self, mock_anthropic):
+        """Test AIGenerators with the same API key reuse one pooled client"""
+        mock_anthropic.side_effect = lambda **kwargs: Mock()
+
+        generator1 = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        generator2 = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        other = AIGenerator("other-api-key", "claude-sonnet-4-20250514")
+
+        assert generator1.client is generator2.client
+        assert other.client is not generator1.client
+
+    def test_initialization_without_api_key(self, mock_mode_generator):
         """Test AIGenerator initialization without API key"""
-        generator = AIGenerator("", "claude-sonnet-4-20250514")
+        generator = mock_mode_generator
         assert generator.api_key == ""
         assert generator.use_mock == True
         # This is the critical issue - client should not exist when use_mock is True
         assert not hasattr(generator, "client")
 
-    def test_initialization_with_placeholder_api_key(self):
-        """Test AIGenerator initialization with placeholder API key"""
-        generator = AIGenerator(
-            "your-anthropic-api-key-here", "claude-sonnet-4-20250514"
-        )
-        assert generator.use_mock == True
+    @pytest.mark.parametrize("api_key", ["", "your-anthropic-api-key-here"])
+    @pytest.mark.parametrize("with_tools", [False, True])
+    def test_mock_response_variants(self, api_key, with_tools):
+        """Test missing or placeholder keys return the mock response"""
+        generator = AIGenerator(api_key, "claude-sonnet-4-20250514")
+        assert generator.use_mock
         assert not hasattr(generator, "client")
 
-    def test_generate_response_without_api_key_uses_mock(self):
-        """Test that mock response is used when no API key is provided"""
-        generator = AIGenerator("", "claude-sonnet-4-20250514")
+        kwargs = {}
+        if with_tools:
+            kwargs = {
+                "tools": [{"name": "test_tool", "description": "Test tool"}],
+                "tool_manager": Mock(),
+            }
 
         # Should return mock response, not raise an error
-        result = generator.generate_response("What is computer use?")
-
-        # Verify the mock response is returned
-        assert (
-            result
-            == "API key not configured. Please set your Anthropic API key to use this service."
+        assert generator.generate_response("Test query", **kwargs) == MOCK_RESPONSE
+
+    def test_generate_response_with_rounds_without_api_key_uses_mock(
+        self, mock_mode_generator
+    ):
+        """Test the multi-round entry point short-circuits to the mock response"""
+        generator = mock_mode_generator
+
+        result = generator.generate_response_with_rounds(
+            "What is computer use?",
+            tools=[{"name": "search_tool"}],
+            tool_manager=Mock(),
         )
 
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_generate_response_with_valid_api_key(self, mock_anthropic):
+        assert "API key not configured" in result
+
+    def test_generate_response_with_valid_api_key(self, mock_client):
         """Test generate_response with valid API key"""
-        # Mock the Anthropic client
-        mock_client = Mock()
-        mock_response = Mock()
-        mock_response.content = [Mock(text="Test response")]
-        mock_response.stop_reason = "stop"
+        mock_response = _response(TextBlock("Test response"))
         mock_client.messages.create.return_value = mock_response
-        mock_anthropic.return_value = mock_client
 
         generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
         result = generator.generate_response("Test query")
@@ -67,49 +133,20 @@ class TestAIGenerator:
         assert result == "Test response"
         mock_client.messages.create.assert_called_once()
 
-    def test_generate_response_with_tools_but_no_api_key(self):
-        """Test generate_response with tools but no API key returns mock response"""
-        generator = AIGenerator("", "claude-sonnet-4-20250514")
-
-        mock_tools = [{"name": "test_tool", "description": "Test tool"}]
-        mock_tool_manager = Mock()
-
-        # Should return mock response, not raise an error
-        result = generator.generate_response(
-            "Test query", tools=mock_tools, tool_manager=mock_tool_manager
-        )
-
-        # Verify the mock response is returned
-        assert (
-            result
-            == "API key not configured. Please set your Anthropic API key to use this service."
-        )
-
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_tool_execution_flow(self, mock_anthropic):
+    def test_tool_execution_flow(self, mock_client):
         """Test tool execution flow with valid API key"""
-        # Mock the Anthropic client for tool use
-        mock_client = Mock()
-
         # First response with tool use
-        mock_tool_response = Mock()
-        mock_tool_response.stop_reason = "tool_use"
-        mock_tool_block = Mock()
-        mock_tool_block.type = "tool_use"
-        mock_tool_block.name = "search_course_content"
-        mock_tool_block.input = {"query": "test"}
-        mock_tool_block.id = "tool_123"
-        mock_tool_response.content = [mock_tool_block]
+        mock_tool_response = _response(
+            _tool_use_block("search_course_content", {"query": "test"}, "tool_123")
+        )
 
         # Final response after tool execution
-        mock_final_response = Mock()
-        mock_final_response.content = [Mock(text="Final response with tool results")]
+        mock_final_response = _response(TextBlock("Final response with tool results"))
 
         mock_client.messages.create.side_effect = [
             mock_tool_response,
             mock_final_response,
         ]
-        mock_anthropic.return_value = mock_client
 
         # Mock tool manager
         mock_tool_manager = Mock()
@@ -128,67 +165,47 @@ class TestAIGenerator:
             "search_course_content", query="test"
         )
 
-    def test_mock_response_method_exists_and_used(self):
-        """Test that _generate_mock_response exists and is properly called"""
-        generator = AIGenerator("", "claude-sonnet-4-20250514")
-
-        # The method should exist
-        assert hasattr(generator, "_generate_mock_response")
-
-        # Calling generate_response should now use it (bug fixed)
-        result = generator.generate_response("Test query")
-        assert (
-            result
-            == "API key not configured. Please set your Anthropic API key to use this service."
-        )
-
     def test_system_prompt_configuration(self):
         """Test that system prompt is properly configured"""
         generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
 
         assert hasattr(generator, "SYSTEM_PROMPT")
-        assert "course materials" in generator.SYSTEM_PROMPT.lower()
-        assert "content search tool" in generator.SYSTEM_PROMPT.lower()
-        assert "course outline tool" in generator.SYSTEM_PROMPT.lower()
-        assert "multi-round tool usage" in generator.SYSTEM_PROMPT.lower()
-        assert "up to 2 rounds" in generator.SYSTEM_PROMPT.lower()
-
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_multi_round_tool_calling_two_rounds(self, mock_anthropic):
-        """Test successful two-round tool execution"""
-        mock_client = Mock()
+        prompt = generator.SYSTEM_PROMPT.lower()
+        required = (
+            "course materials",
+            "content search tool",
+            "course outline tool",
+            "multi-round tool usage",
+            "up to 2 rounds",
+        )
+        missing = [keyword for keyword in required if keyword not in prompt]
+        assert not missing, f"missing keywords: {missing}"
 
+    @pytest.mark.slow
+    def test_multi_round_tool_calling_two_rounds(self, mock_client):
+        """Test successful two-round tool execution"""
         # Round 1: Tool use response
-        mock_round1_response = Mock()
-        mock_round1_response.stop_reason = "tool_use"
-        mock_tool_block1 = Mock()
-        mock_tool_block1.type = "tool_use"
-        mock_tool_block1.name = "get_course_outline"
-        mock_tool_block1.input = {"course_id": "course-x"}
-        mock_tool_block1.id = "tool_round1"
-        mock_round1_response.content = [mock_tool_block1]
+        mock_round1_response = _response(
+            _tool_use_block(
+                "get_course_outline", {"course_id": "course-x"}, "tool_round1"
+            )
+        )
 
         # Round 2: Tool use response
-        mock_round2_response = Mock()
-        mock_round2_response.stop_reason = "tool_use"
-        mock_tool_block2 = Mock()
-        mock_tool_block2.type = "tool_use"
-        mock_tool_block2.name = "search_course_content"
-        mock_tool_block2.input = {"query": "authentication"}
-        mock_tool_block2.id = "tool_round2"
-        mock_round2_response.content = [mock_tool_block2]
+        mock_round2_response = _response(
+            _tool_use_block(
+                "search_course_content", {"query": "authentication"}, "tool_round2"
+            )
+        )
 
         # Final response
-        mock_final_response = Mock()
-        mock_final_response.content = [Mock(text="Combined response from both rounds")]
-        mock_final_response.stop_reason = "stop"
+        mock_final_response = _response(TextBlock("Combined response from both rounds"))
 
         mock_client.messages.create.side_effect = [
             mock_round1_response,
             mock_round2_response,
             mock_final_response,
         ]
-        mock_anthropic.return_value = mock_client
 
         # Mock tool manager
         mock_tool_manager = Mock()
@@ -221,18 +238,13 @@ class TestAIGenerator:
             "search_course_content", query="authentication"
         )
 
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_multi_round_early_termination_no_tools(self, mock_anthropic):
+    @pytest.mark.slow
+    def test_multi_round_early_termination_no_tools(self, mock_client):
         """Test early termination when Claude doesn't use tools"""
-        mock_client = Mock()
-
         # Claude responds without using tools in first round
-        mock_response = Mock()
-        mock_response.stop_reason = "stop"
-        mock_response.content = [Mock(text="Direct answer without tools")]
+        mock_response = _response(TextBlock("Direct answer without tools"))
 
         mock_client.messages.create.return_value = mock_response
-        mock_anthropic.return_value = mock_client
 
         generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
         tools = [{"name": "search_tool", "description": "Search"}]
@@ -248,41 +260,27 @@ class TestAIGenerator:
         # Should have no tool executions
         assert mock_tool_manager.execute_tool.call_count == 0
 
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_multi_round_max_rounds_enforcement(self, mock_anthropic):
+    @pytest.mark.slow
+    def test_multi_round_max_rounds_enforcement(self, mock_client):
         """Test that tool calling stops after 2 rounds"""
-        mock_client = Mock()
-
         # Round 1: Tool use
-        mock_round1_response = Mock()
-        mock_round1_response.stop_reason = "tool_use"
-        mock_tool_block1 = Mock()
-        mock_tool_block1.type = "tool_use"
-        mock_tool_block1.name = "search_tool"
-        mock_tool_block1.input = {"query": "test1"}
-        mock_tool_block1.id = "tool_round1"
-        mock_round1_response.content = [mock_tool_block1]
+        mock_round1_response = _response(
+            _tool_use_block("search_tool", {"query": "test1"}, "tool_round1")
+        )
 
         # Round 2: Tool use
-        mock_round2_response = Mock()
-        mock_round2_response.stop_reason = "tool_use"
-        mock_tool_block2 = Mock()
-        mock_tool_block2.type = "tool_use"
-        mock_tool_block2.name = "search_tool"
-        mock_tool_block2.input = {"query": "test2"}
-        mock_tool_block2.id = "tool_round2"
-        mock_round2_response.content = [mock_tool_block2]
+        mock_round2_response = _response(
+            _tool_use_block("search_tool", {"query": "test2"}, "tool_round2")
+        )
 
         # Final response (forced after max rounds)
-        mock_final_response = Mock()
-        mock_final_response.content = [Mock(text="Final answer after 2 rounds")]
+        mock_final_response = _response(TextBlock("Final answer after 2 rounds"))
 
         mock_client.messages.create.side_effect = [
             mock_round1_response,
             mock_round2_response,
             mock_final_response,
         ]
-        mock_anthropic.return_value = mock_client
 
         mock_tool_manager = Mock()
         mock_tool_manager.execute_tool.return_value = "Tool result"
@@ -302,30 +300,20 @@ class TestAIGenerator:
         # Should have 2 tool executions (one per round)
         assert mock_tool_manager.execute_tool.call_count == 2
 
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_single_round_backwards_compatibility(self, mock_anthropic):
+    def test_single_round_backwards_compatibility(self, mock_client):
         """Test that single-round behavior is preserved when multi-round is disabled"""
-        mock_client = Mock()
-
         # Tool use response
-        mock_tool_response = Mock()
-        mock_tool_response.stop_reason = "tool_use"
-        mock_tool_block = Mock()
-        mock_tool_block.type = "tool_use"
-        mock_tool_block.name = "search_tool"
-        mock_tool_block.input = {"query": "test"}
-        mock_tool_block.id = "tool_123"
-        mock_tool_response.content = [mock_tool_block]
+        mock_tool_response = _response(
+            _tool_use_block("search_tool", {"query": "test"}, "tool_123")
+        )
 
         # Final response
-        mock_final_response = Mock()
-        mock_final_response.content = [Mock(text="Single round response")]
+        mock_final_response = _response(TextBlock("Single round response"))
 
         mock_client.messages.create.side_effect = [
             mock_tool_response,
             mock_final_response,
         ]
-        mock_anthropic.return_value = mock_client
 
         mock_tool_manager = Mock()
         mock_tool_manager.execute_tool.return_value = "Tool result"
@@ -347,23 +335,165 @@ class TestAIGenerator:
         # Should have 1 tool execution
         assert mock_tool_manager.execute_tool.call_count == 1
 
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_tool_execution_error_handling(self, mock_anthropic):
-        """Test error handling when tool execution fails"""
-        mock_client = Mock()
+    def test_prompt_caching_breakpoints(self, mock_client):
+        """Test system prompt and tool definitions are sent as cacheable blocks"""
+        mock_response = _response(TextBlock("Cached answer"))
+        mock_client.messages.create.return_value = mock_response
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        tools = [
+            {"name": "get_course_outline", "description": "Get course outline"},
+            {"name": "search_course_content", "description": "Search content"},
+        ]
+
+        generator.generate_response("Test query", tools=tools, tool_manager=Mock())
+
+        call_kwargs = mock_client.messages.create.call_args.kwargs
+        system_blocks = call_kwargs["system"]
+        assert system_blocks[0]["text"] == generator.SYSTEM_PROMPT
+        assert system_blocks[0]["cache_control"] == {"type": "ephemeral"}
+        assert all("cache_control" not in block for block in system_blocks[1:])
+
+        sent_tools = call_kwargs["tools"]
+        assert sent_tools[-1]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in sent_tools[0]
+        # Caller's tool definitions must not be mutated
+        assert all("cache_control" not in tool for tool in tools)
+
+    def test_response_text_skips_non_text_blocks(self, mock_client):
+        """Test the answer is taken from text blocks, not content[0]"""
+        mock_response = _response(
+            SimpleNamespace(type="thinking", thinking="..."),
+            TextBlock("Part one. "),
+            TextBlock("Part two."),
+        )
+        mock_client.messages.create.return_value = mock_response
 
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        result = generator.generate_response("Test query")
+
+        assert result == "Part one. Part two."
+
+    def test_system_content_built_once_per_round(self):
+        """Test round system content is memoized and keeps the shared prefix"""
+        generator = AIGenerator("", "claude-sonnet-4-20250514")
+
+        first_round = generator._build_system_content_for_round(1, 2)
+        final_round = generator._build_system_content_for_round(2, 2, final_round=True)
+
+        assert generator._build_system_content_for_round(1, 2) is first_round
+        assert first_round[0] is final_round[0]
+        assert "ROUND 1/2" in first_round[1]["text"]
+        assert "final response" in final_round[1]["text"]
+        assert generator._build_system_content_for_round(0, 0) == [first_round[0]]
+
+    def test_conversation_history_sent_as_messages(self, mock_client):
+        """Test history is prepended to messages and kept out of the system prompt"""
+        mock_response = _response(TextBlock("Follow-up answer"))
+        mock_client.messages.create.return_value = mock_response
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        history = [
+            {"role": "user", "content": "What is MCP?"},
+            {"role": "assistant", "content": "MCP is a protocol."},
+        ]
+
+        generator.generate_response(
+            "Tell me more",
+            conversation_history=history,
+            tools=[{"name": "search_tool", "description": "Search"}],
+            tool_manager=Mock(),
+        )
+
+        call_kwargs = mock_client.messages.create.call_args.kwargs
+        assert call_kwargs["messages"] == history + [
+            {"role": "user", "content": "Tell me more"}
+        ]
+        system_text = "".join(block["text"] for block in call_kwargs["system"])
+        assert "MCP is a protocol." not in system_text
+        # Caller's history list must not be mutated
+        assert len(history) == 2
+
+    def test_response_cache_skips_repeated_calls(self, mock_client):
+        """Test identical requests are served from the response cache"""
+        mock_response = _response(TextBlock("Cached answer"))
+        mock_client.messages.create.return_value = mock_response
+
+        generator = AIGenerator(
+            "valid-api-key", "claude-sonnet-4-20250514", response_cache_size=1
+        )
+        tools = [{"name": "search_tool", "description": "Search"}]
+
+        first = generator.generate_response(
+            "Q1", tools=tools, tool_manager=ToolManager()
+        )
+        second = generator.generate_response(
+            "Q1", tools=tools, tool_manager=ToolManager()
+        )
+        assert first == second == "Cached answer"
+        assert mock_client.messages.create.call_count == 1
+
+        # A different query evicts the only slot and hits the API again
+        generator.generate_response("Q2", tools=tools, tool_manager=ToolManager())
+        generator.generate_response("Q1", tools=tools, tool_manager=ToolManager())
+        assert mock_client.messages.create.call_count == 3
+
+    def test_response_cache_replays_sources(self, mock_client):
+        """Test a cached answer brings back the sources its tool calls cited"""
+        mock_client.messages.create.side_effect = [
+            _response(_tool_use_block("search_tool", {"query": "Q1"}, "tool_1")),
+            _response(TextBlock("Answer citing a lesson")),
+        ]
+        generator = AIGenerator(
+            "valid-api-key", "claude-sonnet-4-20250514", response_cache_size=1
+        )
+        tools = [SourcedTool().get_tool_definition()]
+        first_manager = ToolManager()
+        first_manager.register_tool(SourcedTool())
+        second_manager = first_manager.scope()
+
+        generator.generate_response("Q1", tools=tools, tool_manager=first_manager)
+        cached = generator.generate_response(
+            "Q1", tools=tools, tool_manager=second_manager
+        )
+
+        assert cached == "Answer citing a lesson"
+        assert mock_client.messages.create.call_count == 2
+        assert second_manager.get_last_sources() == [SourcedTool.SOURCE]
+
+    def test_clear_response_cache(self, mock_client):
+        """Test clearing the response cache sends the next request to Claude"""
+        mock_client.messages.create.return_value = _response(TextBlock("Answer"))
+        generator = AIGenerator(
+            "valid-api-key", "claude-sonnet-4-20250514", response_cache_size=1
+        )
+
+        generator.generate_response("Q1")
+        generator.clear_response_cache()
+        generator.generate_response("Q1")
+
+        assert mock_client.messages.create.call_count == 2
+
+    def test_response_cache_disabled_by_default(self, mock_client):
+        """Test responses are not cached unless a cache size is configured"""
+        mock_response = _response(TextBlock("Fresh answer"))
+        mock_client.messages.create.return_value = mock_response
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+
+        generator.generate_response("Q1")
+        generator.generate_response("Q1")
+
+        assert mock_client.messages.create.call_count == 2
+
+    def test_tool_execution_error_handling(self, mock_client):
+        """Test error handling when tool execution fails"""
         # Tool use response
-        mock_tool_response = Mock()
-        mock_tool_response.stop_reason = "tool_use"
-        mock_tool_block = Mock()
-        mock_tool_block.type = "tool_use"
-        mock_tool_block.name = "failing_tool"
-        mock_tool_block.input = {"query": "test"}
-        mock_tool_block.id = "tool_123"
-        mock_tool_response.content = [mock_tool_block]
+        mock_tool_response = _response(
+            _tool_use_block("failing_tool", {"query": "test"}, "tool_123")
+        )
 
         mock_client.messages.create.return_value = mock_tool_response
-        mock_anthropic.return_value = mock_client
 
         # Mock tool manager that raises exception
         mock_tool_manager = Mock()
@@ -381,12 +511,46 @@ class TestAIGenerator:
         assert mock_client.messages.create.call_count == 1
         assert mock_tool_manager.execute_tool.call_count == 1
 
-    @patch("ai_generator.anthropic.Anthropic")
-    def test_api_error_handling(self, mock_anthropic):
+    def test_parallel_tool_execution_preserves_order(self, mock_client):
+        """Test tool calls in one round run concurrently and keep their order"""
+        tool_response = _response(
+            _tool_use_block("get_course_outline", {"course_name": "MCP"}, "tool_1"),
+            _tool_use_block("search_course_content", {"query": "MCP"}, "tool_2"),
+        )
+        final_response = _response(TextBlock("Answer"))
+        mock_client.messages.create.side_effect = [tool_response, final_response]
+
+        # The first tool only finishes once the second has started
+        second_started = threading.Event()
+
+        def execute_tool(name, **kwargs):
+            if name == "get_course_outline":
+                assert second_started.wait(timeout=5)
+                return "Outline"
+            second_started.set()
+            return "Search results"
+
+        mock_tool_manager = Mock()
+        mock_tool_manager.execute_tool.side_effect = execute_tool
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        result = generator.generate_response(
+            "Test query",
+            tools=[{"name": "get_course_outline"}],
+            tool_manager=mock_tool_manager,
+        )
+
+        assert result == "Answer"
+        tool_results = mock_client.messages.create.call_args.kwargs["messages"][-1][
+            "content"
+        ]
+        assert [r["tool_use_id"] for r in tool_results] == ["tool_1", "tool_2"]
+        assert [r["content"] for r in tool_results] == ["Outline", "Search results"]
+        assert not any(r.get("is_error") for r in tool_results)
+
+    def test_api_error_handling(self, mock_client):
         """Test error handling when API call fails"""
-        mock_client = Mock()
         mock_client.messages.create.side_effect = Exception("API call failed")
-        mock_anthropic.return_value = mock_client
 
         generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
         tools = [{"name": "search_tool", "description": "Search"}]
@@ -400,6 +564,206 @@ class TestAIGenerator:
         assert "Error in round 1" in result
         assert "API call failed" in result
 
+    @patch("ai_generator.anthropic.AsyncAnthropic")
+    async def test_generate_response_batch(self, mock_async_anthropic):
+        """Test batch generation runs every query and preserves input order"""
+        mock_async_client = AsyncMock()
+
+        async def fake_create(**params):
+            query = params["messages"][-1]["content"]
+            return _response(TextBlock(f"Answer to {query}"))
+
+        mock_async_client.messages.create.side_effect = fake_create
+        mock_async_anthropic.return_value = mock_async_client
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        queries = ["first", "second", "third"]
+
+        results = await generator.generate_response_batch(queries, max_concurrency=2)
+
+        assert results == ["Answer to first", "Answer to second", "Answer to third"]
+        assert mock_async_client.messages.create.call_count == 3
+        # The pooled client outlives the batch
+        mock_async_client.close.assert_not_awaited()
+
+    @patch("ai_generator.anthropic.AsyncAnthropic")
+    async def test_async_client_pooled_per_loop(self, mock_async_anthropic):
+        """Test async calls on one loop share a client; other loops get their own"""
+        mock_async_client = AsyncMock()
+        mock_async_client.messages.create.return_value = _response(TextBlock("Answer"))
+        mock_async_anthropic.return_value = mock_async_client
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        await generator.agenerate_response("first")
+        await generator.generate_response_batch(["second", "third"])
+
+        assert mock_async_anthropic.call_count == 1
+
+        # A client is tied to its loop, so a fresh loop builds a new one
+        await asyncio.to_thread(asyncio.run, generator.agenerate_response("fourth"))
+
+        assert mock_async_anthropic.call_count == 2
+
+    @patch("ai_generator.anthropic.AsyncAnthropic")
+    async def test_agenerate_response_runs_tools_concurrently(
+        self, mock_async_anthropic
+    ):
+        """Test a round's tool calls are awaited together and keep their order"""
+        tool_response = _response(
+            _tool_use_block("get_course_outline", {"course_name": "MCP"}, "tool_1"),
+            _tool_use_block("search_course_content", {"query": "MCP"}, "tool_2"),
+        )
+        mock_async_client = AsyncMock()
+        mock_async_client.messages.create.side_effect = [
+            tool_response,
+            _response(TextBlock("Answer")),
+        ]
+        mock_async_anthropic.return_value = mock_async_client
+
+        # The first tool only finishes once the second has started
+        second_started = asyncio.Event()
+
+        async def aexecute_tool(name, **kwargs):
+            if name == "get_course_outline":
+                await asyncio.wait_for(second_started.wait(), timeout=5)
+                return "Outline"
+            second_started.set()
+            return "Search results"
+
+        mock_tool_manager = Mock()
+        mock_tool_manager.aexecute_tool.side_effect = aexecute_tool
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        history = [
+            {"role": "user", "content": "Earlier question"},
+            {"role": "assistant", "content": "Earlier answer"},
+        ]
+        result = await generator.agenerate_response(
+            "Test query",
+            conversation_history=history,
+            tools=[{"name": "get_course_outline"}],
+            tool_manager=mock_tool_manager,
+        )
+
+        assert result == "Answer"
+        messages = mock_async_client.messages.create.call_args.kwargs["messages"]
+        assert messages[:2] == history
+        tool_results = messages[-1]["content"]
+        assert [r["tool_use_id"] for r in tool_results] == ["tool_1", "tool_2"]
+        assert [r["content"] for r in tool_results] == ["Outline", "Search results"]
+
+    async def test_generate_response_batch_without_api_key(self, mock_mode_generator):
+        """Test batch generation falls back to mock responses without API key"""
+        generator = mock_mode_generator
+
+        results = await generator.generate_response_batch(["q1", "q2"])
+
+        assert (
+            results
+            == [
+                "API key not configured. Please set your Anthropic API key to use this service."
+            ]
+            * 2
+        )
+
+    @patch("ai_generator.time.sleep")
+    def test_generate_response_batch_submit(self, mock_sleep, mock_client):
+        """Test Message Batches results are matched back to query order"""
+        pending = SimpleNamespace(id="batch_1", processing_status="in_progress")
+        ended = SimpleNamespace(id="batch_1", processing_status="ended")
+        mock_client.messages.batches.create.return_value = pending
+        mock_client.messages.batches.retrieve.return_value = ended
+
+        def batch_entry(custom_id, text=None):
+            if text:
+                result = SimpleNamespace(
+                    type="succeeded", message=_response(TextBlock(text))
+                )
+            else:
+                result = SimpleNamespace(type="errored")
+            return SimpleNamespace(custom_id=custom_id, result=result)
+
+        mock_client.messages.batches.results.return_value = [
+            batch_entry("query-1", "Second answer"),
+            batch_entry("query-0", "First answer"),
+            batch_entry("query-2"),
+        ]
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        results = generator.generate_response_batch_submit(["a", "b", "c"])
+
+        assert results == ["First answer", "Second answer", "Batch request errored"]
+        requests = mock_client.messages.batches.create.call_args.kwargs["requests"]
+        assert [r["custom_id"] for r in requests] == ["query-0", "query-1", "query-2"]
+        mock_client.messages.batches.retrieve.assert_called_once_with("batch_1")
+        mock_sleep.assert_called_once()
+
+    def test_generate_response_stream_with_tools(self, mock_client):
+        """Test streaming drops a tool round's preamble and streams the answer"""
+        preamble = TextBlock("Let me search for that.")
+        tool_use = _tool_use_block("search_course_content", {"query": "MCP"}, "tool_1")
+
+        def make_stream(chunks, final_message=None):
+            stream = MagicMock()
+            stream.__enter__.return_value = stream
+            stream.text_stream = iter(chunks)
+            stream.get_final_message.return_value = final_message
+            return stream
+
+        mock_client.messages.stream.side_effect = [
+            make_stream([preamble.text], _response(preamble, tool_use)),
+            make_stream(["MCP is ", "a protocol."]),
+        ]
+
+        tool_manager = Mock()
+        tool_manager.execute_tool.return_value = "Search results"
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        chunks = list(
+            generator.generate_response_stream(
+                "What is MCP?",
+                tools=[{"name": "search_course_content"}],
+                tool_manager=tool_manager,
+                max_rounds=1,
+            )
+        )
+
+        assert chunks == ["MCP is ", "a protocol."]
+        tool_manager.execute_tool.assert_called_once_with(
+            "search_course_content", query="MCP"
+        )
+        assert mock_client.messages.stream.call_count == 2
+        final_kwargs = mock_client.messages.stream.call_args_list[1].kwargs
+        assert "tools" not in final_kwargs
+        mock_client.messages.create.assert_not_called()
+
+    def test_generate_response_stream_matches_non_streaming(self, mock_client):
+        """Test a round answered without tools streams what generate returns"""
+        answer = _response(TextBlock("MCP is a protocol."))
+        stream = MagicMock()
+        stream.__enter__.return_value = stream
+        stream.text_stream = iter(["MCP is ", "a protocol."])
+        stream.get_final_message.return_value = answer
+        mock_client.messages.stream.return_value = stream
+        mock_client.messages.create.return_value = answer
+
+        generator = AIGenerator("valid-api-key", "claude-sonnet-4-20250514")
+        kwargs = {"tools": [{"name": "search_course_content"}], "tool_manager": Mock()}
+        streamed = "".join(generator.generate_response_stream("What is MCP?", **kwargs))
+
+        assert streamed == generator.generate_response_with_rounds(
+            "What is MCP?", **kwargs
+        )
+
+    def test_generate_response_stream_without_api_key(self, mock_mode_generator):
+        """Test streaming falls back to the mock response"""
+        generator = mock_mode_generator
+
+        chunks = list(generator.generate_response_stream("What is MCP?"))
+
+        assert len(chunks) == 1
+        assert "API key not configured" in chunks[0]
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
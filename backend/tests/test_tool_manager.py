@@ -1,13 +1,11 @@
-import os
-import sys
+import threading
+from types import SimpleNamespace
 from unittest.mock import Mock
 
 import pytest
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
-from search_tools import Tool, ToolManager
+from ai_generator import AIGenerator
+from search_tools import CourseSearchTool, Tool, ToolManager
+from vector_store import SearchResults
 
 
 class MockTool(Tool):
@@ -17,11 +15,10 @@ class MockTool(Tool):
         self.name = name
         self.should_fail = should_fail
         self.last_sources = []
-
-    def get_tool_definition(self):
-        return {
-            "name": self.name,
-            "description": f"Mock tool named {self.name}",
+        # Built once per instance; the definition only depends on the name
+        self._definition = {
+            "name": name,
+            "description": f"Mock tool named {name}",
             "input_schema": {
                 "type": "object",
                 "properties": {
@@ -31,6 +28,9 @@ class MockTool(Tool):
             },
         }
 
+    def get_tool_definition(self):
+        return self._definition
+
     def execute(self, **kwargs):
         if self.should_fail:
             raise Exception("Mock tool execution failed")
@@ -42,6 +42,53 @@ class MockTool(Tool):
         return f"Mock result for: {query}"
 
 
+class OverlappingSearchTool(CourseSearchTool):
+    """
+    Search tool whose last_sources writes each wait until the other concurrent
+    call has stored its own, so reading them back afterwards would mix them up
+    """
+
+    def __init__(self, vector_store):
+        self._both_stored = threading.Barrier(2, timeout=5)
+        super().__init__(vector_store)
+
+    @property
+    def last_sources(self):
+        return self._last_sources
+
+    @last_sources.setter
+    def last_sources(self, value):
+        self._last_sources = value
+        if value:
+            self._both_stored.wait()
+
+
+def _search_store():
+    """Vector store whose results name the course after the query"""
+    vector_store = Mock()
+    vector_store.search.side_effect = lambda query, **_: SearchResults(
+        documents=[f"About {query}"],
+        metadata=[{"course_title": query}],
+        distances=[0.1],
+    )
+    return vector_store
+
+
+def _two_search_round():
+    """Claude response asking for two searches in the same round"""
+    return SimpleNamespace(
+        content=[
+            SimpleNamespace(
+                type="tool_use",
+                id=f"toolu_{index}",
+                name="search_course_content",
+                input={"query": query},
+            )
+            for index, query in enumerate(["Course A", "Course B"])
+        ]
+    )
+
+
 class TestToolManager:
     """Test cases for ToolManager class"""
 
@@ -54,14 +101,18 @@ class TestToolManager:
         assert isinstance(self.tool_manager.tools, dict)
         assert len(self.tool_manager.tools) == 0
 
-    def test_register_tool_success(self):
-        """Test successful tool registration"""
-        mock_tool = MockTool("test_tool")
+    @pytest.mark.parametrize("n_tools", [0, 1, 2, 5])
+    def test_registration(self, n_tools):
+        """Test registered tools and their definitions, in registration order"""
+        tools = [MockTool(f"tool_{i}") for i in range(n_tools)]
+        for tool in tools:
+            self.tool_manager.register_tool(tool)
 
-        self.tool_manager.register_tool(mock_tool)
+        assert list(self.tool_manager.tools.values()) == tools
 
-        assert "test_tool" in self.tool_manager.tools
-        assert self.tool_manager.tools["test_tool"] is mock_tool
+        definitions = self.tool_manager.get_tool_definitions()
+        assert isinstance(definitions, tuple)
+        assert [d["name"] for d in definitions] == [f"tool_{i}" for i in range(n_tools)]
 
     def test_register_tool_without_name(self):
         """Test registering tool without name in definition"""
@@ -75,46 +126,41 @@ class TestToolManager:
 
         bad_tool = BadTool()
 
-        with pytest.raises(ValueError) as exc_info:
+        with pytest.raises(
+            ValueError, match="Tool must have a 'name' in its definition"
+        ):
             self.tool_manager.register_tool(bad_tool)
 
-        assert "Tool must have a 'name' in its definition" in str(exc_info.value)
-
-    def test_register_multiple_tools(self):
-        """Test registering multiple tools"""
-        tool1 = MockTool("tool_one")
-        tool2 = MockTool("tool_two")
-
-        self.tool_manager.register_tool(tool1)
-        self.tool_manager.register_tool(tool2)
+    def test_get_tool_definitions_cached(self):
+        """Test definitions are built at registration and reused per call"""
+        tool = MockTool("tool_one")
+        tool.get_tool_definition = Mock(wraps=tool.get_tool_definition)
 
-        assert len(self.tool_manager.tools) == 2
-        assert "tool_one" in self.tool_manager.tools
-        assert "tool_two" in self.tool_manager.tools
+        self.tool_manager.register_tool(tool)
+        first = self.tool_manager.get_tool_definitions()
+        second = self.tool_manager.get_tool_definitions()
 
-    def test_get_tool_definitions(self):
-        """Test getting all tool definitions"""
-        tool1 = MockTool("tool_one")
-        tool2 = MockTool("tool_two")
-
-        self.tool_manager.register_tool(tool1)
-        self.tool_manager.register_tool(tool2)
+        assert first is second
+        assert tool.get_tool_definition.call_count == 1
 
+    def test_get_tool_definitions_not_mutable_by_callers(self):
+        """Test callers can't grow the shared definitions cache"""
+        self.tool_manager.register_tool(MockTool("tool_one"))
         definitions = self.tool_manager.get_tool_definitions()
 
-        assert isinstance(definitions, list)
-        assert len(definitions) == 2
+        with pytest.raises(AttributeError):
+            definitions.append({"name": "injected"})
 
-        names = [def_["name"] for def_ in definitions]
-        assert "tool_one" in names
-        assert "tool_two" in names
+        assert [d["name"] for d in self.tool_manager.get_tool_definitions()] == [
+            "tool_one"
+        ]
 
-    def test_get_tool_definitions_empty(self):
-        """Test getting tool definitions when no tools registered"""
-        definitions = self.tool_manager.get_tool_definitions()
+    def test_reregister_tool_replaces_definition(self):
+        """Test registering a tool under an existing name replaces it"""
+        self.tool_manager.register_tool(MockTool("tool_one"))
+        self.tool_manager.register_tool(MockTool("tool_one"))
 
-        assert isinstance(definitions, list)
-        assert len(definitions) == 0
+        assert len(self.tool_manager.get_tool_definitions()) == 1
 
     def test_execute_tool_success(self):
         """Test successful tool execution"""
@@ -145,16 +191,25 @@ class TestToolManager:
 
         assert result == "Tool 'nonexistent_tool' not found"
 
+    async def test_aexecute_tool(self):
+        """Test async tool execution and the unknown tool message"""
+        mock_tool = MockTool("test_tool")
+        self.tool_manager.register_tool(mock_tool)
+
+        result = await self.tool_manager.aexecute_tool("test_tool", query="async")
+        missing = await self.tool_manager.aexecute_tool("nonexistent_tool")
+
+        assert result == "Mock result for: async"
+        assert missing == "Tool 'nonexistent_tool' not found"
+
     def test_execute_tool_with_exception(self):
         """Test tool execution when tool raises exception"""
         failing_tool = MockTool("failing_tool", should_fail=True)
         self.tool_manager.register_tool(failing_tool)
 
-        with pytest.raises(Exception) as exc_info:
+        with pytest.raises(Exception, match="Mock tool execution failed"):
             self.tool_manager.execute_tool("failing_tool", query="test")
 
-        assert "Mock tool execution failed" in str(exc_info.value)
-
     def test_get_last_sources_with_sources(self):
         """Test getting last sources when tool has sources"""
         mock_tool = MockTool("test_tool")
@@ -192,14 +247,74 @@ class TestToolManager:
         # Execute first tool
         self.tool_manager.execute_tool("tool_one", query="first query")
 
-        # Execute second tool (should override first)
+        # Execute second tool
         self.tool_manager.execute_tool("tool_two", query="second query")
 
         sources = self.tool_manager.get_last_sources()
 
-        # Should return sources from the tool that has them (last executed)
-        assert len(sources) == 1
-        assert "second query" in sources[0]["text"]
+        # Should aggregate sources from every tool that has them
+        assert len(sources) == 2
+        assert "first query" in sources[0]["text"]
+        assert "second query" in sources[1]["text"]
+
+    def test_get_last_sources_repeated_calls(self):
+        """Test every call's sources are kept until reset, not just the last"""
+        mock_tool = MockTool("test_tool")
+        self.tool_manager.register_tool(mock_tool)
+
+        self.tool_manager.execute_tool("test_tool", query="first query")
+        self.tool_manager.execute_tool("test_tool", query="second query")
+
+        sources = self.tool_manager.get_last_sources()
+
+        assert [s["text"] for s in sources] == [
+            "Source for first query",
+            "Source for second query",
+        ]
+
+    def test_get_last_sources_returns_copy(self):
+        """Test callers can't change the gathered sources through the result"""
+        self.tool_manager.register_tool(MockTool("test_tool"))
+        self.tool_manager.execute_tool("test_tool", query="test query")
+
+        self.tool_manager.get_last_sources().clear()
+
+        assert len(self.tool_manager.get_last_sources()) == 1
+
+    def test_concurrent_searches_keep_their_own_sources(self):
+        """Test two searches run in one round each report their own sources"""
+        self.tool_manager.register_tool(OverlappingSearchTool(_search_store()))
+
+        AIGenerator._execute_tool_calls(_two_search_round(), self.tool_manager)
+
+        sources = self.tool_manager.get_last_sources()
+        assert sorted(s["text"] for s in sources) == ["Course A", "Course B"]
+
+    async def test_concurrent_async_searches_keep_their_own_sources(self):
+        """Test the async path keeps each concurrent search's own sources"""
+        self.tool_manager.register_tool(OverlappingSearchTool(_search_store()))
+
+        await AIGenerator._aexecute_tool_calls(_two_search_round(), self.tool_manager)
+
+        sources = self.tool_manager.get_last_sources()
+        assert sorted(s["text"] for s in sources) == ["Course A", "Course B"]
+
+    def test_scope_collects_its_own_sources(self):
+        """Test scoped managers share tools but not the sources they gather"""
+        self.tool_manager.register_tool(MockTool("test_tool"))
+        first = self.tool_manager.scope()
+        second = self.tool_manager.scope()
+
+        first.execute_tool("test_tool", query="first query")
+        second.execute_tool("test_tool", query="second query")
+        second.reset_sources()
+
+        assert [s["text"] for s in first.get_last_sources()] == [
+            "Source for first query"
+        ]
+        assert second.get_last_sources() == []
+        assert self.tool_manager.get_last_sources() == []
+        assert first.get_tool_definitions() == self.tool_manager.get_tool_definitions()
 
     def test_reset_sources(self):
         """Test resetting sources from all tools"""
@@ -219,7 +334,6 @@ class TestToolManager:
         # Verify sources are cleared
         sources = self.tool_manager.get_last_sources()
         assert len(sources) == 0
-        assert mock_tool.last_sources == []
 
     def test_reset_sources_multiple_tools(self):
         """Test resetting sources from multiple tools"""
@@ -237,8 +351,6 @@ class TestToolManager:
         self.tool_manager.reset_sources()
 
         # Verify all sources are cleared
-        assert tool1.last_sources == []
-        assert tool2.last_sources == []
         assert self.tool_manager.get_last_sources() == []
 
     def test_reset_sources_tools_without_sources_attribute(self):
@@ -44,26 +44,39 @@ class SearchResults:
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    def __init__(
+        self,
+        chroma_path: str,
+        embedding_model: str,
+        max_results: int = 5,
+        client=None,
+        embedding_function=None,
+        collection_prefix: str = "",
+    ):
         self.max_results = max_results
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
+        # Initialize ChromaDB client unless an existing one is shared in
+        self.client = client or chromadb.PersistentClient(
             path=chroma_path, settings=Settings(anonymized_telemetry=False)
         )
 
-        # Set up sentence transformer embedding function
-        self.embedding_function = (
+        # Set up sentence transformer embedding function; loading the model
+        # is the expensive part, so callers may pass one they already built
+        self.embedding_function = embedding_function or (
             chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(
                 model_name=embedding_model
             )
         )
 
+        # Prefixed names let several stores share one client
+        self.catalog_name = f"{collection_prefix}course_catalog"
+        self.content_name = f"{collection_prefix}course_content"
+
         # Create collections for different types of data
         self.course_catalog = self._create_collection(
-            "course_catalog"
+            self.catalog_name
         )  # Course titles/instructors
         self.course_content = self._create_collection(
-            "course_content"
+            self.content_name
         )  # Actual course material
 
     def _create_collection(self, name: str):
@@ -147,41 +160,59 @@ class VectorStore:
 
         return {"lesson_number": lesson_number}
 
-    def add_course_metadata(self, course: Course):
+    def add_course_bundle(self, course: Course, chunks: List[CourseChunk]):
+        """
+        Add a course's catalog entry and content chunks together, embedding
+        the title and every chunk in a single batched model call.
+        """
+        texts = [course.title] + [chunk.content for chunk in chunks]
+        embeddings = self.embedding_function(texts)
+        self.add_course_metadata(course, embeddings[0])
+        self.add_course_content(chunks, embeddings[1:])
+
+    def add_course_metadata(
+        self, course: Course, embedding: Optional[List[float]] = None
+    ):
         """Add course information to the catalog for semantic search"""
-        import json
-
-        course_text = course.title
-
-        # Build lessons metadata and serialize as JSON string
-        lessons_metadata = []
-        for lesson in course.lessons:
-            lessons_metadata.append(
-                {
-                    "lesson_number": lesson.lesson_number,
-                    "lesson_title": lesson.title,
-                    "lesson_link": lesson.lesson_link,
-                }
-            )
-
         self.course_catalog.add(
-            documents=[course_text],
-            metadatas=[
-                {
-                    "title": course.title,
-                    "instructor": course.instructor,
-                    "course_link": course.course_link,
-                    "lessons_json": json.dumps(
-                        lessons_metadata
-                    ),  # Serialize as JSON string
-                    "lesson_count": len(course.lessons),
-                }
-            ],
+            documents=[course.title],
+            metadatas=[self._course_metadata(course)],
             ids=[course.title],
+            embeddings=[embedding] if embedding is not None else None,
         )
 
-    def add_course_content(self, chunks: List[CourseChunk]):
-        """Add course content chunks to the vector store"""
+    @staticmethod
+    def _course_metadata(course: Course) -> Dict[str, Any]:
+        """Catalog metadata for a course, with lessons serialized as JSON"""
+        import json
+
+        lessons_metadata = [
+            {
+                "lesson_number": lesson.lesson_number,
+                "lesson_title": lesson.title,
+                "lesson_link": lesson.lesson_link,
+            }
+            for lesson in course.lessons
+        ]
+        return {
+            "title": course.title,
+            "instructor": course.instructor,
+            "course_link": course.course_link,
+            "lessons_json": json.dumps(lessons_metadata),  # Serialize as JSON string
+            "lesson_count": len(course.lessons),
+        }
+
+    def add_course_content(
+        self,
+        chunks: List[CourseChunk],
+        embeddings: Optional[List[List[float]]] = None,
+    ):
+        """
+        Add course content chunks to the vector store.
+
+        Precomputed embeddings, one per chunk, skip the collection's
+        embedding function entirely.
+        """
         if not chunks:
             return
 
@@ -200,16 +231,18 @@ class VectorStore:
             for chunk in chunks
         ]
 
-        self.course_content.add(documents=documents, metadatas=metadatas, ids=ids)
+        self.course_content.add(
+            documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings
+        )
 
     def clear_all_data(self):
         """Clear all data from both collections"""
         try:
-            self.client.delete_collection("course_catalog")
-            self.client.delete_collection("course_content")
+            self.client.delete_collection(self.catalog_name)
+            self.client.delete_collection(self.content_name)
             # Recreate collections
-            self.course_catalog = self._create_collection("course_catalog")
-            self.course_content = self._create_collection("course_content")
+            self.course_catalog = self._create_collection(self.catalog_name)
+            self.course_content = self._create_collection(self.content_name)
         except Exception as e:
             print(f"Error clearing data: {e}")
 
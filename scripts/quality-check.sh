@@ -17,7 +17,7 @@ echo ""
 
 # Run tests
 echo "3️⃣  Running tests..."
-cd backend && uv run pytest tests/ -v
+cd backend && uv run pytest tests/ -v -n auto --dist loadgroup -m ""
 
 echo ""
 echo "🎉 Quality check completed!"
\ No newline at end of file